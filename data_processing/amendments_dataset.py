@@ -0,0 +1,417 @@
+import os
+import sys
+import json
+import mmap
+import zlib
+import base64
+import struct
+import argparse
+import datetime
+from array import array
+
+import yaml
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(SCRIPT_DIR, "amendments_pipeline.dataset")
+YAML_FILE = os.path.join(SCRIPT_DIR, "amendments_pipeline.yaml")
+
+MAGIC = b"AMDS"
+FORMAT_VERSION = 1
+COMPRESS_LEVEL = 6
+# Missing value in index columns
+NA = -1
+
+# Top-level record fields with a columnar encoding, in the order the scraper writes them
+STRING_FIELDS = ('convention', 'url', 'label', 'author', 'type')
+FIELDS = ('convention', 'url', 'label', 'author', 'isprs', 'type', 'applicant_details', 'supporters')
+PERSON_KEYS = ('id', 'name', 'kv')
+
+# Pool each index section points into (sections not listed have a pool of their own name)
+SECTION_POOLS = {
+    **{f: f for f in STRING_FIELDS},
+    'applicant_id': 'person_id', 'applicant_name': 'person_name', 'applicant_kv': 'kv',
+    'supporter_id': 'person_id', 'supporter_name': 'person_name', 'supporter_kv': 'kv',
+}
+
+_MISSING = object()
+
+class StringPool:
+    """Interns strings to dense int indices."""
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, value):
+        i = self.index.get(value)
+        if i is None:
+            if "\0" in value:
+                raise ValueError(f"NUL character in dataset string: {value!r}")
+            i = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def encode(self):
+        return "\0".join(self.strings).encode('utf-8')
+
+_PERSON_KEY_SET = frozenset(PERSON_KEYS)
+
+def _is_person(value):
+    return (isinstance(value, dict) and value.keys() <= _PERSON_KEY_SET
+            and all(isinstance(v, str) for v in value.values()))
+
+# Key marking a JSON object in the extra section as an encoded YAML value that JSON has no type for
+EXTRA_TAG = "__yaml__"
+
+def _encode_extra(value):
+    """
+    JSON-safe form of a YAML value. Timestamps, dates, sets, binary and mappings with non-string
+    keys are tagged with EXTRA_TAG so _decode_extra restores them; anything else raises TypeError.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, list):
+        return [_encode_extra(v) for v in value]
+    if isinstance(value, dict):
+        if EXTRA_TAG not in value and all(isinstance(k, str) for k in value):
+            return {k: _encode_extra(v) for k, v in value.items()}
+        return {EXTRA_TAG: 'map', 'items': [[_encode_extra(k), _encode_extra(v)] for k, v in value.items()]}
+    # datetime is a subclass of date, so it is checked first
+    if isinstance(value, datetime.datetime):
+        return {EXTRA_TAG: 'timestamp', 'value': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {EXTRA_TAG: 'date', 'value': value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return {EXTRA_TAG: 'set', 'items': [_encode_extra(v) for v in value]}
+    if isinstance(value, bytes):
+        return {EXTRA_TAG: 'binary', 'value': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Cannot store {type(value).__name__} value in dataset: {value!r}")
+
+def _decode_extra(obj):
+    """json.loads object_hook reversing _encode_extra."""
+    tag = obj.get(EXTRA_TAG)
+    if tag is None:
+        return obj
+    if tag == 'map':
+        return {k: v for k, v in obj['items']}
+    if tag == 'timestamp':
+        return datetime.datetime.fromisoformat(obj['value'])
+    if tag == 'date':
+        return datetime.date.fromisoformat(obj['value'])
+    if tag == 'set':
+        return set(obj['items'])
+    if tag == 'binary':
+        return base64.b64decode(obj['value'])
+    raise ValueError(f"Unknown tag in dataset extra section: {tag!r}")
+
+def write_dataset(data, path=DATASET_FILE, yaml_path=None):
+    """
+    Writes {aid: record} as a columnar dataset file, atomically.
+    `yaml_path` names a YAML snapshot holding the same records; its size and mtime are recorded
+    so load_records can tell whether the YAML was changed afterwards.
+    Strings are interned per pool and stored once; fields that do not fit the columnar schema
+    (unknown keys, unexpected types) are kept per record in the JSON `extra` section, so the
+    round trip is lossless.
+    """
+    pools = {name: StringPool() for name in (*STRING_FIELDS, 'id', 'person_id', 'person_name', 'kv')}
+    sections = {name: array('i') for name in (
+        'id', *STRING_FIELDS, 'applicant_id', 'applicant_name', 'applicant_kv',
+        'supporter_id', 'supporter_name', 'supporter_kv',
+    )}
+    sections['isprs'] = array('b')
+    sections['applicant_present'] = array('b')
+    sections['supporters_present'] = array('b')
+    sections['supporters_offsets'] = array('i', [0])
+    extra = {}
+    # (append, intern) pairs per person key, hoisted out of the per-supporter loop
+    applicant_columns = [(sections[f'applicant_{k}'].append, pools[SECTION_POOLS[f'applicant_{k}']].add)
+                         for k in PERSON_KEYS]
+    supporter_columns = [(sections[f'supporter_{k}'].append, pools[SECTION_POOLS[f'supporter_{k}']].add)
+                         for k in PERSON_KEYS]
+
+    for row, (aid, info) in enumerate(data.items()):
+        sections['id'].append(pools['id'].add(aid))
+        info = info or {}
+        leftover = {k: v for k, v in info.items() if k not in FIELDS}
+
+        for field in STRING_FIELDS:
+            value = info.get(field, _MISSING)
+            if isinstance(value, str):
+                sections[field].append(pools[field].add(value))
+            else:
+                sections[field].append(NA)
+                if value is not _MISSING:
+                    leftover[field] = value
+
+        isprs = info.get('isprs', _MISSING)
+        if isinstance(isprs, bool):
+            sections['isprs'].append(int(isprs))
+        else:
+            sections['isprs'].append(NA)
+            if isprs is not _MISSING:
+                leftover['isprs'] = isprs
+
+        applicant = info.get('applicant_details', _MISSING)
+        columnar = _is_person(applicant)
+        sections['applicant_present'].append(int(columnar))
+        for key, (append, intern) in zip(PERSON_KEYS, applicant_columns):
+            value = applicant.get(key) if columnar else None
+            append(NA if value is None else intern(value))
+        if applicant is not _MISSING and not columnar:
+            leftover['applicant_details'] = applicant
+
+        supporters = info.get('supporters', _MISSING)
+        offsets = sections['supporters_offsets']
+        columnar = isinstance(supporters, list) and all(_is_person(s) for s in supporters)
+        sections['supporters_present'].append(int(columnar))
+        if columnar:
+            for s in supporters:
+                for key, (append, intern) in zip(PERSON_KEYS, supporter_columns):
+                    value = s.get(key)
+                    append(NA if value is None else intern(value))
+        elif supporters is not _MISSING:
+            leftover['supporters'] = supporters
+        offsets.append(len(sections['supporter_id']))
+
+        if leftover:
+            # Remember where each non-columnar key sat so the record keeps its key order
+            order = list(info.keys())
+            extra[row] = {'order': order, 'values': leftover}
+
+    _write_sections(path, len(data), sections, pools, extra, yaml_path)
+
+def _write_sections(path, count, sections, pools, extra, yaml_path=None):
+    blobs = []
+    for name, values in sections.items():
+        if sys.byteorder == "big":
+            values.byteswap()
+        blobs.append(('section', name, values.typecode, values.tobytes()))
+    for name, pool in pools.items():
+        blobs.append(('pool', name, None, pool.encode()))
+    encoded = {row: _encode_extra(entry) for row, entry in extra.items()}
+    blobs.append(('extra', 'extra', None, json.dumps(encoded, ensure_ascii=False).encode('utf-8')))
+
+    header = {'version': FORMAT_VERSION, 'records': count, 'section': {}, 'pool': {}, 'extra': {}}
+    if yaml_path and os.path.exists(yaml_path):
+        header['yaml'] = _yaml_stamp(yaml_path)
+    offset = 0
+    payload = []
+    for kind, name, typecode, raw in blobs:
+        packed = zlib.compress(raw, COMPRESS_LEVEL)
+        header[kind][name] = {'offset': offset, 'length': len(packed), 'typecode': typecode}
+        payload.append(packed)
+        offset += len(packed)
+    # A pool holding only "" encodes to the same bytes as an empty one, so the string count tells them apart
+    for name, pool in pools.items():
+        header['pool'][name]['count'] = len(pool.strings)
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    temp_file = path + ".tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<HI", FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for packed in payload:
+            f.write(packed)
+    os.replace(temp_file, path)
+
+class Dataset:
+    """
+    Lazy reader of a dataset file. The file is memory-mapped and a section is only
+    decompressed when a field that needs it is requested, e.g.
+    `Dataset().records(['convention', 'supporters'])` never touches labels or URLs.
+    """
+
+    def __init__(self, path=DATASET_FILE):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a dataset file")
+        version, header_length = struct.unpack_from("<HI", self._map, 4)
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        start = 4 + struct.calcsize("<HI")
+        self.header = json.loads(self._map[start:start + header_length])
+        self._data_start = start + header_length
+        self._sections = {}
+        self._pools = {}
+        self._ids = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.header['records']
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def _raw(self, kind, name):
+        entry = self.header[kind][name]
+        start = self._data_start + entry['offset']
+        return zlib.decompress(self._map[start:start + entry['length']]), entry
+
+    def section(self, name):
+        if name not in self._sections:
+            raw, entry = self._raw('section', name)
+            values = array(entry['typecode'])
+            values.frombytes(raw)
+            if sys.byteorder == "big":
+                values.byteswap()
+            self._sections[name] = values
+        return self._sections[name]
+
+    def pool(self, name):
+        if name not in self._pools:
+            raw, entry = self._raw('pool', name)
+            # Files from before the count was recorded fall back to treating empty bytes as an empty pool
+            count = entry.get('count', 1 if raw else 0)
+            self._pools[name] = raw.decode('utf-8').split("\0") if count else []
+        return self._pools[name]
+
+    def _strings(self, section):
+        pool = self.pool(SECTION_POOLS.get(section, section))
+        return [pool[i] if i >= 0 else None for i in self.section(section)]
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = self._strings('id')
+        return self._ids
+
+    def column(self, field):
+        """Values of one field for all records, in dataset order; _MISSING where a record lacks the field."""
+        if field in STRING_FIELDS:
+            values = [_MISSING if v is None else v for v in self._strings(field)]
+        elif field == 'isprs':
+            values = [_MISSING if v < 0 else bool(v) for v in self.section('isprs')]
+        elif field == 'applicant_details':
+            present = self.section('applicant_present')
+            parts = [self._strings(f'applicant_{key}') for key in PERSON_KEYS]
+            values = [
+                {k: v for k, v in zip(PERSON_KEYS, person) if v is not None} if flag else _MISSING
+                for flag, *person in zip(present, *parts)
+            ]
+        elif field == 'supporters':
+            offsets = self.section('supporters_offsets')
+            people = [
+                {k: v for k, v in zip(PERSON_KEYS, person) if v is not None}
+                for person in zip(*(self._strings(f'supporter_{key}') for key in PERSON_KEYS))
+            ]
+            values = [
+                people[start:end] if flag else _MISSING
+                for flag, start, end in zip(self.section('supporters_present'), offsets, offsets[1:])
+            ]
+        else:
+            raise KeyError(f"Unknown dataset field: {field}")
+        return values
+
+    def extra(self):
+        if 'extra' not in self._pools:
+            raw, _ = self._raw('extra', 'extra')
+            self._pools['extra'] = {int(row): e for row, e in json.loads(raw, object_hook=_decode_extra).items()}
+        return self._pools['extra']
+
+    def records(self, fields=None):
+        """
+        Returns {aid: record} like the YAML snapshot, restricted to `fields` (all fields if None).
+        Keys outside the columnar schema are only included when loading all fields.
+        """
+        wanted = FIELDS if fields is None else [f for f in FIELDS if f in fields]
+        columns = [self.column(f) for f in wanted]
+        records = {}
+        for aid, *values in zip(self.ids, *columns):
+            records[aid] = {f: v for f, v in zip(wanted, values) if v is not _MISSING}
+        ids = self.ids
+        for row, entry in self.extra().items():
+            extra = {k: v for k, v in entry['values'].items() if fields is None or k in fields}
+            if extra:
+                record = {**records[ids[row]], **extra}
+                records[ids[row]] = {k: record[k] for k in entry['order'] if k in record}
+        return records
+
+def read_yaml(path=YAML_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+
+def write_yaml(data, path=YAML_FILE):
+    """Atomic YAML export in the scraper's layout."""
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+                  allow_unicode=True, sort_keys=False, width=1000)
+    os.replace(temp_file, path)
+
+def _yaml_stamp(yaml_path):
+    st = os.stat(yaml_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def _yaml_changed(dataset, yaml_path):
+    """
+    True if the YAML snapshot differs from the one recorded when the dataset was written.
+    Datasets written without a YAML stamp fall back to comparing modification times.
+    """
+    stamp = dataset.header.get('yaml')
+    if stamp is None:
+        return os.path.getmtime(yaml_path) > os.path.getmtime(dataset.path)
+    return stamp != _yaml_stamp(yaml_path)
+
+def load_records(fields=None, path=DATASET_FILE, yaml_path=YAML_FILE):
+    """
+    Loads {aid: record} for the given fields from the dataset file.
+    If only the YAML snapshot at yaml_path exists (or it changed since the dataset was written,
+    e.g. by a hand edit), it is imported into the dataset file first. Returns None if neither exists.
+    """
+    has_yaml = bool(yaml_path) and os.path.exists(yaml_path)
+    if os.path.exists(path):
+        with Dataset(path) as dataset:
+            if not (has_yaml and _yaml_changed(dataset, yaml_path)):
+                return dataset.records(fields)
+    elif not has_yaml:
+        return None
+    print(f"Importing {yaml_path} into {path}...")
+    write_dataset(read_yaml(yaml_path), path, yaml_path)
+    with Dataset(path) as dataset:
+        return dataset.records(fields)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between amendments_pipeline.yaml and the binary dataset")
+    parser.add_argument("--dataset", default=DATASET_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_cmd = sub.add_parser("import", help="Build the dataset file from a YAML snapshot")
+    import_cmd.add_argument("yaml", nargs="?", default=YAML_FILE)
+    export_cmd = sub.add_parser("export", help="Write the dataset as YAML")
+    export_cmd.add_argument("yaml", nargs="?", default=YAML_FILE)
+    sub.add_parser("stats", help="Print record count and section sizes")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        data = read_yaml(args.yaml)
+        write_dataset(data, args.dataset, args.yaml)
+        print(f"Wrote {len(data)} records to {args.dataset}")
+    elif args.command == "export":
+        with Dataset(args.dataset) as dataset:
+            data = dataset.records()
+        write_yaml(data, args.yaml)
+        # Record the new export in the dataset, so the next load does not import it again
+        write_dataset(data, args.dataset, args.yaml)
+        print(f"Wrote {len(data)} records to {args.yaml}")
+    elif args.command == "stats":
+        with Dataset(args.dataset) as dataset:
+            print(f"{len(dataset)} records, {os.path.getsize(args.dataset) / 1e6:.2f} MB")
+            for kind in ('section', 'pool'):
+                for name, entry in dataset.header[kind].items():
+                    print(f"  {kind} {name}: {entry['length'] / 1e3:.1f} kB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
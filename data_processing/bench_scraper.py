@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import functools
+import threading
+import contextvars
+
+import pipeline_scraper
+from http_client import PooledClient
+from replay_server import STARTING_PAGES_DIR, ReplayServer, add_fault_arguments, faults_from_args
+from html_archive import HTML_ARCHIVE
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+class ClientStats:
+    """One benchmark run's page timings and per-host retry counters, shared by its clients."""
+
+    def __init__(self):
+        self.queue_wait = []
+        self.request_time = []
+        self.counters = {'requests': 0, 'retries': 0, 'throttled': 0, 'errors': 0}
+
+# Token waits of the fetch running in the current task
+_token_waits = contextvars.ContextVar("token_waits", default=None)
+
+class TimedLimiter:
+    """Wraps a host's rate limiter and records how long each acquire() waits for a token."""
+
+    def __init__(self, limiter):
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        return getattr(self._limiter, name)
+
+    async def acquire(self):
+        t0 = time.perf_counter()
+        await self._limiter.acquire()
+        waits = _token_waits.get()
+        if waits is not None:
+            waits.append(time.perf_counter() - t0)
+
+class InstrumentedClient(PooledClient):
+    """
+    PooledClient that records, per page, the time spent waiting for rate-limiter tokens and the
+    request time (all attempts, without those waits), plus the per-host retry counters.
+    """
+
+    def __init__(self, *args, stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats if stats is not None else ClientStats()
+
+    def host_client(self, url):
+        hc = super().host_client(url)
+        if not isinstance(hc.limiter, TimedLimiter):
+            hc.limiter = TimedLimiter(hc.limiter)
+        return hc
+
+    async def get(self, url, headers=None):
+        waits = []
+        token = _token_waits.set(waits)
+        t0 = time.perf_counter()
+        try:
+            return await super().get(url, headers)
+        except Exception:
+            self.stats.counters['errors'] += 1
+            raise
+        finally:
+            wait = sum(waits)
+            self.stats.queue_wait.append(wait)
+            self.stats.request_time.append(time.perf_counter() - t0 - wait)
+            _token_waits.reset(token)
+
+    async def close(self):
+        for hc in self.hosts.values():
+            self.stats.counters['requests'] += hc.requests
+            self.stats.counters['retries'] += hc.retries
+            self.stats.counters['throttled'] += hc.throttled
+        await super().close()
+
+def _summary(values):
+    return {
+        'p50': round(percentile(values, 50), 4),
+        'p90': round(percentile(values, 90), 4),
+        'p99': round(percentile(values, 99), 4),
+        'max': round(max(values, default=0.0), 4),
+    }
+
+def start_server_thread(server):
+    """Runs the replay server on its own event loop, since main() runs its own asyncio loops."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    return loop
+
+def stop_server_thread(server, loop):
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+def run_benchmark(args):
+    server = ReplayServer(args.starting_pages, args.archive, faults_from_args(args))
+    loop = start_server_thread(server)
+    work_dir = tempfile.mkdtemp(prefix="scraper_bench_")
+    ps = pipeline_scraper
+    try:
+        # Point the whole pipeline at the replay server and a scratch directory
+        captured = set(server.starting_pages.values())
+        ps.URLS = [server.rewrite_url(u) for u in ps.URLS if u.strip('/').split('/')[-1] in captured]
+        ps.STARTING_PAGES_DIR = os.path.join(work_dir, "html_starting_pages")
+        ps.HTML_ARCHIVE = os.path.join(work_dir, "amendments_html.sqlite")
+        ps.YAML_FILE = os.path.join(work_dir, "amendments_pipeline.yaml")
+        ps.DATASET_FILE = os.path.join(work_dir, "amendments_pipeline.dataset")
+        ps.JOURNAL_FILE = os.path.join(work_dir, "amendments_pipeline.journal.jsonl")
+        ps.HTTP_CACHE_DB = os.path.join(work_dir, "http_cache.sqlite")
+        ps.MAX_CONNECTIONS_PER_HOST = args.max_connections
+        stats = ClientStats()
+        ps.PooledClient = functools.partial(InstrumentedClient, stats=stats)
+
+        metrics_file = os.path.join(work_dir, "scraper_metrics.json")
+        argv = ["--no-parse-cache", "--workers", str(args.workers), "--metrics-json", metrics_file]
+        if args.stream:
+            argv.append("--stream")
+        t0 = time.perf_counter()
+        ps.main(ps.parse_args(argv))
+        elapsed = time.perf_counter() - t0
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            run_metrics = json.load(f)
+    finally:
+        stop_server_thread(server, loop)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    pages = len(stats.request_time)
+    return {
+        'wall_time_s': round(elapsed, 3),
+        'pages': pages,
+        'pages_per_s': round(pages / elapsed, 2) if elapsed else 0.0,
+        'client': dict(stats.counters),
+        # Request time covers all attempts and retry backoff; waiting for rate-limiter tokens is reported apart
+        'latency_s': _summary(stats.request_time),
+        'queue_wait_s': _summary(stats.queue_wait),
+        'server': server.stats,
+        'stages_s': run_metrics['stages_s'],
+        'run_metrics': run_metrics,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline_scraper.main() against the local replay server")
+    parser.add_argument("--starting-pages", default=STARTING_PAGES_DIR)
+    parser.add_argument("--archive", default=HTML_ARCHIVE)
+    parser.add_argument("--max-connections", type=int, default=pipeline_scraper.MAX_CONNECTIONS_PER_HOST)
+    parser.add_argument("--workers", type=int, default=pipeline_scraper.PARSE_WORKERS)
+    parser.add_argument("--stream", action="store_true", help="Benchmark the streaming download→parse mode")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archive) or not os.path.isdir(args.starting_pages):
+        print("Captured pages not found. Run pipeline_scraper.py first or pass --starting-pages/--archive.")
+        return 1
+
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+from array import array
+
+import numpy as np
+
+# Node sides, as encoded in BipartiteGraph.node_order
+AMENDMENT = 0
+PERSON = 1
+
+# Edge roles
+AUTHORED = 0
+SUPPORTS = 1
+
+class Interner:
+    """Maps IDs to dense int indices in first-seen order."""
+
+    __slots__ = ('index', 'ids')
+
+    def __init__(self):
+        self.index = {}
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, key, default=None):
+        return self.index.get(key, default)
+
+    def add(self, key):
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.ids)
+            self.ids.append(key)
+        return i
+
+class Adjacency:
+    """
+    CSR adjacency of one side: the edges of node n are edges[indptr[n]:indptr[n + 1]],
+    as edge indices in insertion order.
+    """
+
+    __slots__ = ('indptr', 'edges')
+
+    def __init__(self, edge_nodes, node_count):
+        self.edges = np.argsort(edge_nodes, kind='stable')
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_nodes, minlength=node_count), out=self.indptr[1:])
+
+    def __getitem__(self, node):
+        return self.edges[self.indptr[node]:self.indptr[node + 1]]
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+class BipartiteGraph:
+    """
+    Person-amendment graph with interned node IDs, column attributes and int32 edge arrays.
+    An attribute that was never given is None, so writers can tell "unset" from "empty".
+    Edges run person -> amendment and are unique per pair; CSR adjacency for both sides
+    is built on first use and dropped when edges are added.
+    """
+
+    __slots__ = (
+        'persons', 'person_label', 'person_kv',
+        'amendments', 'amendment_label', 'amendment_convention', 'amendment_url',
+        'node_order', 'edge_person', 'edge_amendment', 'edge_role',
+        '_edge_keys', '_person_adjacency', '_amendment_adjacency',
+    )
+
+    def __init__(self):
+        self.persons = Interner()
+        self.person_label = []
+        self.person_kv = []
+        self.amendments = Interner()
+        self.amendment_label = []
+        self.amendment_convention = []
+        self.amendment_url = []
+        # Both sides in first-seen order, as index << 1 | side
+        self.node_order = array('q')
+        self.edge_person = array('i')
+        self.edge_amendment = array('i')
+        self.edge_role = array('b')
+        self._edge_keys = set()
+        self._person_adjacency = None
+        self._amendment_adjacency = None
+
+    def add_person(self, pid, label=None, kv=None, fill=False):
+        """
+        Returns the person's index. Attributes are taken from the first call for an ID;
+        with `fill`, later calls also fill in attributes that are still empty.
+        """
+        p = self.persons.add(pid)
+        if p == len(self.person_label):
+            self.person_label.append(label)
+            self.person_kv.append(kv)
+            self.node_order.append(p << 1 | PERSON)
+        elif fill:
+            if not self.person_label[p] and label:
+                self.person_label[p] = label
+            if not self.person_kv[p] and kv:
+                self.person_kv[p] = kv
+        return p
+
+    def add_amendment(self, aid, label=None, convention=None, url=None):
+        """Returns the amendment's index; attributes are taken from the first call for an ID."""
+        a = self.amendments.add(aid)
+        if a == len(self.amendment_label):
+            self.amendment_label.append(label)
+            self.amendment_convention.append(convention)
+            self.amendment_url.append(url)
+            self.node_order.append(a << 1 | AMENDMENT)
+        return a
+
+    def add_edge(self, person, amendment, role):
+        """Adds the edge person -> amendment and returns its index, or -1 if the pair already has one."""
+        key = person << 32 | amendment
+        if key in self._edge_keys:
+            return -1
+        self._edge_keys.add(key)
+        self.edge_person.append(person)
+        self.edge_amendment.append(amendment)
+        self.edge_role.append(role)
+        self._person_adjacency = self._amendment_adjacency = None
+        return len(self.edge_person) - 1
+
+    def has_edge(self, person, amendment):
+        return (person << 32 | amendment) in self._edge_keys
+
+    @property
+    def edge_count(self):
+        return len(self.edge_person)
+
+    def edges(self):
+        """Edge columns as zero-copy NumPy views: (person, amendment, role). Drop them before adding edges."""
+        return (
+            np.frombuffer(self.edge_person, dtype=np.int32),
+            np.frombuffer(self.edge_amendment, dtype=np.int32),
+            np.frombuffer(self.edge_role, dtype=np.int8),
+        )
+
+    def person_adjacency(self):
+        if self._person_adjacency is None:
+            self._person_adjacency = Adjacency(self.edges()[0], len(self.persons))
+        return self._person_adjacency
+
+    def amendment_adjacency(self):
+        if self._amendment_adjacency is None:
+            self._amendment_adjacency = Adjacency(self.edges()[1], len(self.amendments))
+        return self._amendment_adjacency
@@ -0,0 +1,84 @@
+import os
+import json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+JOURNAL_FILE = os.path.join(SCRIPT_DIR, "amendments_pipeline.journal.jsonl")
+
+# Entries between flushes to disk; at most this many parses are redone after a crash
+FLUSH_EVERY = 200
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of per-amendment parse results.
+    Step 5 appends one line per parsed page instead of re-dumping the whole YAML;
+    an interrupted run replays the journal and only parses the remaining pages.
+    Each entry records the sha256 of the page it was parsed from, so a result is only
+    reused while the archive still holds that page.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def replay(self):
+        """
+        Returns {aid: (page_hash, applicant_details, supporters)} from a previous, unfinished run.
+        page_hash is None for entries written without one.
+        """
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line of a crashed run may be cut off
+                    continue
+                entries[entry['aid']] = (entry.get('page_hash'), entry['applicant_details'], entry['supporters'])
+        return entries
+
+    def append(self, aid, page_hash, applicant_details, supporters):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # Start on a fresh line if the previous run died mid-write
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                self._file.write("\n")
+        self._file.write(json.dumps(
+            {'aid': aid, 'page_hash': page_hash, 'applicant_details': applicant_details, 'supporters': supporters},
+            ensure_ascii=False,
+        ) + "\n")
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """Drops the journal once its entries are compacted into the snapshot."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
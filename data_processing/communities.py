@@ -0,0 +1,120 @@
+import numpy as np
+
+RESOLUTION = 1.0
+# A level stops when a sweep moves fewer than this share of its nodes
+MIN_MOVED_SHARE = 1e-3
+MAX_SWEEPS = 50
+MAX_LEVELS = 20
+
+# Cluster colors (RGB), assigned by cluster number; cluster 0 is the largest
+PALETTE = (
+    (31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+    (140, 86, 75), (227, 119, 194), (127, 127, 127), (188, 189, 34), (23, 190, 207),
+    (174, 199, 232), (255, 187, 120), (152, 223, 138), (255, 152, 150), (197, 176, 213),
+    (196, 156, 148), (247, 182, 210), (199, 199, 199), (219, 219, 141), (158, 218, 229),
+)
+
+def symmetric_adjacency(n, sources, targets, weights=None):
+    """
+    Sparse symmetric weighted adjacency of an undirected graph as (rows, cols, values),
+    sorted by row and column, with parallel edges summed.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=np.float64)
+    return _combine(n, np.concatenate([sources, targets]), np.concatenate([targets, sources]),
+                    np.concatenate([weights, weights]))
+
+def _combine(n, rows, cols, values):
+    keys, inverse = np.unique(rows * n + cols, return_inverse=True)
+    return keys // n, keys % n, np.bincount(inverse, weights=values)
+
+def modularity(labels, rows, cols, values, resolution=RESOLUTION):
+    """Newman-Girvan modularity of `labels` on the symmetric adjacency."""
+    m2 = values.sum()
+    if m2 == 0:
+        return 0.0
+    k = len(labels) and labels.max() + 1
+    internal = np.bincount(labels[rows], weights=values * (labels[rows] == labels[cols]), minlength=k)
+    total = np.bincount(labels[rows], weights=values, minlength=k)
+    return float((internal / m2 - resolution * (total / m2) ** 2).sum())
+
+def _move_nodes(n, indptr, cols, values, degree, m2, resolution, rng):
+    """
+    Louvain local moving phase: nodes are visited in a seeded random order and moved to the
+    neighbouring community with the largest modularity gain until a sweep barely changes anything.
+    Returns the community of every node and whether any node moved.
+    """
+    community = list(range(n))
+    total = degree.tolist()
+    degree = degree.tolist()
+    indptr = indptr.tolist()
+    cols = cols.tolist()
+    values = values.tolist()
+    order = rng.permutation(n).tolist()
+    scale = resolution / m2
+    moved_any = False
+    for _ in range(MAX_SWEEPS):
+        moved = 0
+        for i in order:
+            ci = community[i]
+            ki = degree[i]
+            links = {}
+            for e in range(indptr[i], indptr[i + 1]):
+                j = cols[e]
+                if j != i:
+                    c = community[j]
+                    links[c] = links.get(c, 0.0) + values[e]
+            total[ci] -= ki
+            best = ci
+            best_gain = links.get(ci, 0.0) - scale * total[ci] * ki
+            for c, w in links.items():
+                gain = w - scale * total[c] * ki
+                if gain > best_gain:
+                    best, best_gain = c, gain
+            total[best] += ki
+            if best != ci:
+                community[i] = best
+                moved += 1
+        if moved:
+            moved_any = True
+        if moved <= MIN_MOVED_SHARE * n:
+            break
+    return np.array(community, dtype=np.int64), moved_any
+
+def _renumber(labels):
+    """Renumbers labels to 0..k-1, largest community first, ties by first node."""
+    _, first, inverse, counts = np.unique(labels, return_index=True, return_inverse=True, return_counts=True)
+    rank = np.lexsort((first, -counts))
+    new = np.empty(len(rank), dtype=np.int64)
+    new[rank] = np.arange(len(rank))
+    return new[inverse]
+
+def louvain(n, sources, targets, weights=None, resolution=RESOLUTION, seed=0):
+    """
+    Louvain community detection on the undirected weighted graph with `n` nodes.
+    Deterministic for a fixed seed. Returns cluster numbers per node, largest cluster first.
+    """
+    rows, cols, values = symmetric_adjacency(n, sources, targets, weights)
+    m2 = values.sum()
+    labels = np.arange(n, dtype=np.int64)
+    if n == 0 or m2 == 0:
+        return labels
+    rng = np.random.default_rng(seed)
+    size = n
+    for _ in range(MAX_LEVELS):
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        degree = np.bincount(rows, weights=values, minlength=size)
+        community, moved = _move_nodes(size, indptr, cols, values, degree, m2, resolution, rng)
+        if not moved:
+            break
+        # Aggregate: every community becomes a node, its internal weight a self-loop
+        community = _renumber(community)
+        labels = community[labels]
+        size = int(community.max()) + 1
+        rows, cols, values = _combine(size, community[rows], community[cols], values)
+    return _renumber(labels)
+
+def cluster_color(cluster):
+    return PALETTE[cluster % len(PALETTE)]
@@ -0,0 +1,14 @@
+# Convention IDs and their dates
+CONVENTION_DATA = {
+    "43bdk": 2018.86, # 10.11.2018 approx
+    "44bdk": 2019.87, # 16.11.2019
+    "45bdk": 2020.89, # 21.11.2020
+    "46bdk": 2021.45, # 12.06.2021
+    "48bdk": 2022.79, # 15.10.2022
+    "49bdk": 2018.87, # 16.10.2018
+    "50bdk": 2018.88, # 17.10.2018
+    "51bdk": 2018.89, # 18.10.2018
+}
+
+def get_conv_year(cid):
+    return CONVENTION_DATA.get(cid, 2020.0) # Default if not found
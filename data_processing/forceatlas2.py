@@ -0,0 +1,215 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Defaults follow Gephi's ForceAtlas2 for graphs with more than 100 nodes
+ITERATIONS = 1000
+SCALING_RATIO = 2.0
+GRAVITY = 1.0
+EDGE_WEIGHT_INFLUENCE = 1.0
+JITTER_TOLERANCE = 1.0
+# Barnes-Hut opening criterion: a cell is approximated by its center of mass when size / distance < THETA
+THETA = 1.2
+
+# Depth of the quadtree; cells at this depth are resolved particle by particle
+MAX_DEPTH = 16
+# Nodes per repulsion task; bounds the size of the (node, cell) pair arrays
+CHUNK_SIZE = 4096
+
+def _spread_bits(v):
+    """Spreads the low 16 bits of v to the even bit positions (for Morton codes)."""
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+def _expand(pair, lo, hi):
+    """Repeats each pair index once per item of its range [lo, hi); returns (pair indices, items)."""
+    counts = hi - lo
+    total = int(counts.sum())
+    rep = np.repeat(pair, counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    return rep, np.arange(total) - first + np.repeat(lo, counts)
+
+class QuadTree:
+    """
+    Linear quadtree over the node positions: nodes sorted by Morton code, with the
+    mass, center of mass and node range of every non-empty cell at every depth.
+    """
+
+    def __init__(self, pos, mass, max_depth=MAX_DEPTH):
+        self.max_depth = max_depth
+        lo = pos.min(axis=0)
+        self.span = float((pos.max(axis=0) - lo).max()) * (1 + 1e-9) or 1.0
+        grid = 1 << max_depth
+        cell = np.minimum(((pos - lo) / self.span * grid).astype(np.int64), grid - 1)
+        codes = _spread_bits(cell[:, 0]) | (_spread_bits(cell[:, 1]) << 1)
+        self.order = np.argsort(codes, kind='stable')
+        codes = codes[self.order]
+        sorted_mass = mass[self.order]
+        weighted = pos[self.order] * sorted_mass[:, None]
+
+        n = len(codes)
+        self.levels = []
+        for depth in range(max_depth + 1):
+            level_codes = codes >> (2 * (max_depth - depth))
+            starts = np.flatnonzero(np.r_[True, level_codes[1:] != level_codes[:-1]])
+            cell_mass = np.add.reduceat(sorted_mass, starts)
+            center = np.add.reduceat(weighted, starts, axis=0) / cell_mass[:, None]
+            self.levels.append((level_codes[starts], starts, np.r_[starts[1:], n], cell_mass, center))
+
+        # Children of a cell are a contiguous run of the next level's cells
+        self.children = []
+        for depth in range(max_depth):
+            parent_codes = self.levels[depth][0]
+            child_parents = self.levels[depth + 1][0] >> 2
+            self.children.append((
+                np.searchsorted(child_parents, parent_codes, 'left'),
+                np.searchsorted(child_parents, parent_codes, 'right'),
+            ))
+
+    def repulsion(self, nodes, pos, mass, kr, theta=THETA):
+        """Barnes-Hut approximation of the ForceAtlas2 repulsion on `nodes`, as an (len(nodes), 2) array."""
+        force = np.zeros((len(nodes), 2))
+        node_pos = pos[nodes]
+        node_mass = mass[nodes]
+        # Active (node, cell) pairs, starting at the root
+        pair = np.arange(len(nodes))
+        cell = np.zeros(len(nodes), dtype=np.int64)
+        theta2 = theta * theta
+        for depth in range(self.max_depth + 1):
+            if not len(pair):
+                break
+            _, starts, ends, cell_mass, center = self.levels[depth]
+            delta = node_pos[pair] - center[cell]
+            dist2 = np.einsum('ij,ij->i', delta, delta)
+            size = self.span / (1 << depth)
+            # Far cells and cells holding a single node are resolved with their center of mass;
+            # a cell holding only the node itself contributes nothing
+            single = ends[cell] - starts[cell] == 1
+            resolved = (size * size < theta2 * dist2) | single
+            done = resolved & (dist2 > 0) & ~(single & (self.order[starts[cell]] == nodes[pair]))
+            self._accumulate(force, pair[done], delta[done], dist2[done], node_mass[pair[done]] * cell_mass[cell[done]] * kr)
+            pair, cell = pair[~resolved], cell[~resolved]
+            if depth < self.max_depth:
+                lo, hi = self.children[depth]
+                pair, cell = _expand(pair, lo[cell], hi[cell])
+
+        # Cells still open at the deepest level: exact forces from each of their nodes
+        if len(pair):
+            _, starts, ends, _, _ = self.levels[self.max_depth]
+            pair, slot = _expand(pair, starts[cell], ends[cell])
+            other = self.order[slot]
+            delta = node_pos[pair] - pos[other]
+            dist2 = np.einsum('ij,ij->i', delta, delta)
+            keep = dist2 > 0
+            self._accumulate(force, pair[keep], delta[keep], dist2[keep], node_mass[pair[keep]] * mass[other[keep]] * kr)
+        return force
+
+    @staticmethod
+    def _accumulate(force, pair, delta, dist2, strength):
+        # F = kr * m1 * m2 / d along the unit vector, i.e. kr * m1 * m2 * delta / d^2
+        factor = strength / dist2
+        force[:, 0] += np.bincount(pair, weights=delta[:, 0] * factor, minlength=len(force))
+        force[:, 1] += np.bincount(pair, weights=delta[:, 1] * factor, minlength=len(force))
+
+def initial_positions(n, seed=0):
+    """Deterministic random start positions in a square that grows with the node count."""
+    rng = np.random.default_rng(seed)
+    return (rng.random((n, 2)) - 0.5) * (10.0 * math.sqrt(max(n, 1)))
+
+def forceatlas2(n, sources, targets, weights=None, positions=None, iterations=ITERATIONS,
+                scaling_ratio=SCALING_RATIO, gravity=GRAVITY, strong_gravity=False, lin_log=False,
+                edge_weight_influence=EDGE_WEIGHT_INFLUENCE, dissuade_hubs=False,
+                jitter_tolerance=JITTER_TOLERANCE, theta=THETA, seed=0, workers=1, progress=None):
+    """
+    ForceAtlas2 layout of a graph with `n` nodes and edges sources[i] -- targets[i].
+    Repulsion uses a Barnes-Hut quadtree; attraction, gravity and the adaptive speed follow
+    Gephi's implementation. With `workers` > 1 the repulsion is computed in node chunks on
+    a thread pool. `progress` is an optional callable taking the number of finished iterations.
+    Returns an (n, 2) array of positions.
+    """
+    sources = np.asarray(sources, dtype=np.intp)
+    targets = np.asarray(targets, dtype=np.intp)
+    pos = np.array(positions, dtype=np.float64) if positions is not None else initial_positions(n, seed)
+    if n == 0:
+        return pos
+
+    # Node mass is degree + 1
+    mass = (np.bincount(sources, minlength=n) + np.bincount(targets, minlength=n) + 1).astype(np.float64)
+    if weights is None or edge_weight_influence == 0:
+        edge_weight = np.ones(len(sources))
+    else:
+        edge_weight = np.asarray(weights, dtype=np.float64)
+        if edge_weight_influence != 1:
+            edge_weight = edge_weight ** edge_weight_influence
+    # "Dissuade hubs" divides the attraction by the source's mass, rescaled by the mean mass
+    attraction = edge_weight * (mass.mean() / mass[sources] if dissuade_hubs else 1.0)
+
+    chunks = [np.arange(start, min(start + CHUNK_SIZE, n)) for start in range(0, n, CHUNK_SIZE)]
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 and len(chunks) > 1 else None
+
+    speed = 1.0
+    speed_efficiency = 1.0
+    old_force = np.zeros_like(pos)
+    try:
+        for iteration in range(iterations):
+            tree = QuadTree(pos, mass)
+            if executor:
+                force = np.concatenate(list(executor.map(
+                    lambda nodes: tree.repulsion(nodes, pos, mass, scaling_ratio, theta), chunks)))
+            else:
+                force = np.concatenate([tree.repulsion(nodes, pos, mass, scaling_ratio, theta) for nodes in chunks])
+
+            # Gravity towards the origin
+            dist = np.sqrt(np.einsum('ij,ij->i', pos, pos))
+            if strong_gravity:
+                # Gephi's strong gravity is gravity * mass * distance, independent of the scaling ratio
+                force -= pos * (mass * gravity)[:, None]
+            else:
+                nonzero = dist > 0
+                force[nonzero] -= pos[nonzero] * (mass[nonzero] * gravity / dist[nonzero])[:, None]
+
+            # Attraction along the edges
+            delta = pos[sources] - pos[targets]
+            factor = attraction
+            if lin_log:
+                length = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+                factor = np.where(length > 0, attraction * np.log1p(length) / np.where(length > 0, length, 1), 0.0)
+            pull = delta * factor[:, None]
+            for axis in (0, 1):
+                force[:, axis] -= np.bincount(sources, weights=pull[:, axis], minlength=n)
+                force[:, axis] += np.bincount(targets, weights=pull[:, axis], minlength=n)
+
+            # Adaptive speed: global swinging vs. traction, as in Gephi
+            swinging = mass * np.sqrt(((old_force - force) ** 2).sum(axis=1))
+            traction = 0.5 * mass * np.sqrt(((old_force + force) ** 2).sum(axis=1))
+            total_swinging = float(swinging.sum())
+            total_traction = float(traction.sum())
+
+            estimated_jitter = 0.05 * math.sqrt(n)
+            min_jitter = math.sqrt(estimated_jitter)
+            jitter = jitter_tolerance * max(min_jitter, min(10.0, estimated_jitter * total_traction / (n * n)))
+            if total_traction > 0 and total_swinging / total_traction > 2.0:
+                if speed_efficiency > 0.05:
+                    speed_efficiency *= 0.5
+                jitter = max(jitter, jitter_tolerance)
+            if total_swinging > 0:
+                target_speed = jitter * speed_efficiency * total_traction / total_swinging
+                if total_swinging > jitter * total_traction:
+                    if speed_efficiency > 0.05:
+                        speed_efficiency *= 0.7
+                elif speed < 1000:
+                    speed_efficiency *= 1.3
+                speed += min(target_speed - speed, 0.5 * speed)
+
+            pos += force * (speed / (1.0 + np.sqrt(speed * swinging)))[:, None]
+            old_force = force
+            if progress:
+                progress(iteration + 1)
+    finally:
+        if executor:
+            executor.shutdown()
+    return pos
@@ -1,62 +1,61 @@
-import yaml
 import os
 import re
+import sys
+import json
+import bz2
 import gzip
-import shutil
+import lzma
 import math
+import argparse
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import yaml
+import numpy as np
 from tqdm import tqdm
 
+from amendments_dataset import DATASET_FILE, YAML_FILE, load_records
+from bipartite_graph import AUTHORED, PERSON, SUPPORTS, BipartiteGraph
+from communities import RESOLUTION, cluster_color, louvain
+from conventions import get_conv_year
+from forceatlas2 import ITERATIONS, forceatlas2
+from graph_bundle import write_bundle
+from graph_lod import LOD_GRIDS, build_levels, grid_bounds
+from graph_tiles import MAX_ZOOM, TILE_CAPACITY, write_tiles
+
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-YAML_FILE = os.path.join(SCRIPT_DIR, "amendments_pipeline.yaml")
-OUTPUT_GEXF = os.path.join(SCRIPT_DIR, "bdk_all.gexf")
-
-def compress_file(file_path):
-    """Compresses a file using gzip safely."""
-    gz_path = f"{file_path}.gz"
-    temp_gz_path = f"{gz_path}.tmp"
-    print(f"Compressing {file_path} -> {gz_path}")
-    try:
-        with open(file_path, 'rb') as f_in:
-            with gzip.open(temp_gz_path, 'wb', compresslevel=9) as f_out:
-                shutil.copyfileobj(f_in, f_out)
-        
-        # Verify the temp file exists and is not empty
-        if os.path.exists(temp_gz_path) and os.path.getsize(temp_gz_path) > 0:
-            # Atomic rename to the final destination
-            if os.path.exists(gz_path):
-                os.remove(gz_path)
-            os.rename(temp_gz_path, gz_path)
-            os.remove(file_path)
-            print(f"Successfully compressed and removed original: {file_path}")
-        else:
-            if os.path.exists(temp_gz_path):
-                os.remove(temp_gz_path)
-            print(f"Error: Compression failed for {file_path}")
-    except Exception as e:
-        if os.path.exists(temp_gz_path):
-            os.remove(temp_gz_path)
-        print(f"Error compressing {file_path}: {e}")
-
-# Convention IDs and their dates
-CONVENTION_DATA = {
-    "43bdk": 2018.86, # 10.11.2018 approx
-    "44bdk": 2019.87, # 16.11.2019
-    "45bdk": 2020.89, # 21.11.2020
-    "46bdk": 2021.45, # 12.06.2021
-    "48bdk": 2022.79, # 15.10.2022
-    "49bdk": 2018.87, # 16.10.2018
-    "50bdk": 2018.88, # 17.10.2018
-    "51bdk": 2018.89, # 18.10.2018
+# Project manifest: dashboard descriptions plus what goes into each graph; outputs are relative to it
+MANIFEST_FILE = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "static", "data", "descriptions.yaml"))
+
+# Output codecs by file extension; anything else is written uncompressed
+CODECS = {
+    '.gz': lambda f, level: gzip.GzipFile(filename='', mode='wb', fileobj=f, compresslevel=level, mtime=0),
+    '.bz2': lambda f, level: bz2.BZ2File(f, 'wb', compresslevel=level),
+    '.xz': lambda f, level: lzma.LZMAFile(f, 'wb', preset=level),
 }
+COMPRESS_LEVEL = 9
+# Nodes/edges rendered per joined write into the compressor
+WRITE_BATCH = 8192
 
+EDGE_ROW = '      <edge id="e{}" source="{}" target="{}" weight="{}" />\n'
+VIZ_ROW = '        <viz:size value="{2:.4f}" />\n        <viz:position x="{0:.3f}" y="{1:.3f}" />\n'
+COLOR_ROW = '        <viz:color r="{}" g="{}" b="{}" />\n'
+
+# Defaults of the manifest's per-project filters
+# Amendments with fewer supporters aren't in the graph
+MIN_SUPPORTERS = 2
 # If True, persons with only one connection (degree 1) are excluded from the graph
 FILTER_SINGLE_LINK_SUPPORTERS = False
 
-CONVENTION_IDS = list(CONVENTION_DATA.keys())
+PROJECT_WORKERS = os.cpu_count() or 1
+
+# viz:size range; node sizes are ranked linearly by weight, as Gephi does
+SIZE_RANGE = (2.0, 8.0)
 
-def get_conv_year(cid):
-    return CONVENTION_DATA.get(cid, 2020.0) # Default if not found
+# Built network: write_gexf's nodes and edges, plus each edge's node rows and numeric weight for the layout
+Network = namedtuple("Network", ["nodes", "edges", "source_rows", "target_rows", "weights"])
 
 RE_ID_CLEAN = re.compile(r'[^a-z0-9-]')
 
@@ -78,62 +77,179 @@ def escape_xml(text):
             .replace('"', '&quot;')
             .replace("'", '&apos;'))
 
-def generate_gexf():
-    print(f"Loading YAML data from {YAML_FILE}...")
-    if not os.path.exists(YAML_FILE):
-        print(f"Error: {YAML_FILE} not found. Please run the pipeline_scraper.py first.")
-        return
+GEXF_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gexf xmlns="http://www.gexf.net/1.2draft" xmlns:viz="http://www.gexf.net/1.2draft/viz" version="1.2">\n'
+    '  <graph mode="static" defaultedgetype="directed">\n'
+    '    <attributes class="node" mode="static">\n'
+    '      <attribute id="attr_type" title="type" type="string" />\n'
+    '      <attribute id="attr_convention" title="convention" type="string" />\n'
+    '      <attribute id="attr_kv" title="kv" type="string" />\n'
+    '      <attribute id="attr_url" title="url" type="string" />\n'
+    '      <attribute id="attr_weight" title="weight" type="integer" />\n'
+    '      <attribute id="attr_children" title="children" type="string" />\n'
+    '      <attribute id="cluster" title="Cluster" type="integer">\n'
+    '        <default>0</default>\n'
+    '      </attribute>\n'
+    '    </attributes>\n'
+)
+GEXF_FOOTER = '  </graph>\n</gexf>\n'
 
+def render_node(nid, label, ntype, convention, kv, url, weight, viz=None, cluster=None, children=None):
+    """
+    Renders one <node> element with its attvalues; attributes that are None are left out.
+    `viz` is an optional (x, y, size) tuple; a `cluster` number also sets the node's viz:color.
+    `children` are the node IDs a level-of-detail group stands for.
+    """
+    parts = [
+        f'      <node id="{nid}" label="{escape_xml(label)}">\n'
+        '        <attvalues>\n'
+        f'          <attvalue for="attr_type" value="{escape_xml(ntype)}" />\n'
+    ]
+    if convention is not None:
+        parts.append(f'          <attvalue for="attr_convention" value="{escape_xml(convention)}" />\n')
+    if kv is not None:
+        parts.append(f'          <attvalue for="attr_kv" value="{escape_xml(kv)}" />\n')
+    if url is not None:
+        parts.append(f'          <attvalue for="attr_url" value="{escape_xml(url)}" />\n')
+    parts.append(f'          <attvalue for="attr_weight" value="{weight}" />\n')
+    if cluster is not None:
+        parts.append(f'          <attvalue for="cluster" value="{cluster}" />\n')
+    if children is not None:
+        parts.append(f'          <attvalue for="attr_children" value="{escape_xml(" ".join(children))}" />\n')
+    parts.append('        </attvalues>\n')
+    if viz is not None:
+        parts.append(VIZ_ROW.format(*viz))
+    if cluster is not None:
+        parts.append(COLOR_ROW.format(*cluster_color(cluster)))
+    parts.append('      </node>\n')
+    return "".join(parts)
+
+def open_output(raw, path, level=COMPRESS_LEVEL):
+    """Wraps the raw file in the compressor matching the extension of `path`."""
+    codec = CODECS.get(os.path.splitext(path)[1])
+    return codec(raw, level) if codec else raw
+
+def write_gexf(path, nodes, edges, level=COMPRESS_LEVEL, viz=None, clusters=None, children=None):
+    """
+    Streams the graph straight into the compressed output in batched writes.
+    `nodes` are render_node argument tuples, `edges` are (sources, targets, weights) columns,
+    and `viz`, `clusters` and `children` are optional per-node lists of render_node's extra arguments.
+    The file is written next to `path` and renamed into place, so readers never see a partial file.
+    """
+    temp_file = path + ".tmp"
     try:
-        with open(YAML_FILE, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+        with open(temp_file, 'wb') as raw:
+            out = open_output(raw, path, level)
+            out.write(GEXF_HEADER.encode('utf-8'))
+
+            out.write(b'    <nodes>\n')
+            no_extras = [None] * WRITE_BATCH
+            for start in range(0, len(nodes), WRITE_BATCH):
+                end = start + WRITE_BATCH
+                batch = zip(
+                    nodes[start:end],
+                    no_extras if viz is None else viz[start:end],
+                    no_extras if clusters is None else clusters[start:end],
+                    no_extras if children is None else children[start:end],
+                )
+                out.write("".join([render_node(*node, v, c, k) for node, v, c, k in batch]).encode('utf-8'))
+            out.write(b'    </nodes>\n')
+
+            out.write(b'    <edges>\n')
+            row = EDGE_ROW.format
+            sources, targets, weights = edges
+            for start in range(0, len(sources), WRITE_BATCH):
+                end = start + WRITE_BATCH
+                batch = zip(range(start, end), sources[start:end], targets[start:end], weights[start:end])
+                out.write("".join([row(i, s, t, w) for i, s, t, w in batch]).encode('utf-8'))
+            out.write(b'    </edges>\n')
+
+            out.write(GEXF_FOOTER.encode('utf-8'))
+            if out is not raw:
+                out.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+def cube_root_weights(points):
+    """
+    Cube roots of integer point totals, taken with math.pow on the distinct values.
+    np.power's SIMD loops are not always bit-identical to libm, and the totals repeat a lot.
+    """
+    values, inverse = np.unique(points, return_inverse=True)
+    return np.array([math.pow(v, 1/3) for v in values.tolist()])[inverse]
+
+def load_data():
+    """Loads the fields the graphs need, or returns None after printing why not."""
+    print(f"Loading dataset from {DATASET_FILE}...")
+    try:
+        data = load_records(['convention', 'url', 'label', 'author', 'isprs', 'supporters'])
     except Exception as e:
-        print(f"Error loading YAML: {e}")
-        return
+        print(f"Error loading dataset: {e}")
+        return None
 
+    if data is None:
+        print(f"Error: neither {DATASET_FILE} nor {YAML_FILE} found. Please run the pipeline_scraper.py first.")
+        return None
     if not data:
-        print("YAML file is empty.")
-        return
+        print("Dataset is empty.")
+        return None
+    return data
 
+def build_network(data, convention_ids, min_supporters=MIN_SUPPORTERS,
+                  filter_single_link_supporters=FILTER_SINGLE_LINK_SUPPORTERS,
+                  desc="Pass 1: Counting connections", progress=True):
+    """
+    Builds the person-amendment network of the given conventions.
+    Returns a Network whose nodes and edges are as taken by write_gexf.
+    """
     print("Building network...")
-    nodes = {}  # id -> {label, type, ...attrs}
-    
-    # Track person stats per convention: pid -> convention -> {'supports': 0, 'authored': 0}
-    person_convention_stats = {}
-    
-    # Track raw connections to build edges later: (source, target, type)
-    raw_connections = []
-    
-    # Track amendment info for node weights
-    amendment_supporters_count = {} # aid -> count
-    
-    # Track which nodes have at least one connection
-    connected_nodes = set()
-
-    # Track edge uniqueness to avoid duplicates
-    seen_edges = set()
+    graph = BipartiteGraph()
+    conv_index = {cid: i for i, cid in enumerate(convention_ids)}
+
+    # Person-convention pairs in first-seen order: (person index, convention index) -> pair index
+    pair_index = {}
+    pair_person = []
+    pair_conv = []
+
+    # Scatter-add events for the person weights: pair index and points (1 per support, 5 per authorship)
+    event_pair = []
+    event_points = []
+
+    # Supporter entries per amendment, counted with bincount
+    support_amendment = []
+
+    # Person-convention pair of each graph edge
+    edge_pair = []
+
+    def add_event(p, c, points):
+        key = (p, c)
+        pair = pair_index.get(key)
+        if pair is None:
+            pair = pair_index[key] = len(pair_person)
+            pair_person.append(p)
+            pair_conv.append(c)
+        event_pair.append(pair)
+        event_points.append(points)
+        return pair
 
     # First pass: collect connections and counts
-    for aid, info in tqdm(data.items(), desc="Pass 1: Counting connections"):
+    for aid, info in tqdm(data.items(), desc=desc, disable=not progress):
         convention = info.get('convention')
-        if convention not in CONVENTION_IDS:
+        if convention not in conv_index:
             continue
 
-        # Filter: amendments with less than two supporters aren't in the graph
+        # Filter: amendments with less than min_supporters supporters aren't in the graph
         supporters = info.get('supporters', [])
-        if len(supporters) < 2:
+        if len(supporters) < min_supporters:
             continue
 
-        # Add Amendment Node placeholder
-        if aid not in nodes:
-            nodes[aid] = {
-                'label': info.get('label', aid), 
-                'type': 'amendment', 
-                'convention': convention,
-                'url': info.get('url', '')
-            }
-        
-        amendment_supporters_count[aid] = 0
+        a = graph.add_amendment(aid, label=info.get('label', aid), convention=convention, url=info.get('url', ''))
+        c = conv_index[convention]
 
         # Process Author
         author_name = info.get('author', '').strip()
@@ -144,32 +260,10 @@ def generate_gexf():
             clean_author = re.split(r'\(', author_name)[0].strip()
             if clean_author:
                 author_slug = slugify(clean_author)
-                author_id = f"prs-{author_slug}"
-                
-                if author_id not in nodes:
-                    nodes[author_id] = {
-                        'label': clean_author, 
-                        'type': 'prs'
-                    }
-                
-                # Track stats for person weight
-                if author_id not in person_convention_stats:
-                    person_convention_stats[author_id] = {}
-                if convention not in person_convention_stats[author_id]:
-                    person_convention_stats[author_id][convention] = {'supports': 0, 'authored': 0}
-                person_convention_stats[author_id][convention]['authored'] += 1
-                
-                edge_key = (author_id, aid)
-                if edge_key not in seen_edges:
-                    raw_connections.append({
-                        'source': author_id, 
-                        'target': aid, 
-                        'type': 'authored',
-                        'convention': convention
-                    })
-                    seen_edges.add(edge_key)
-                    connected_nodes.add(author_id)
-                    connected_nodes.add(aid)
+                p = graph.add_person(f"prs-{author_slug}", label=clean_author)
+                pair = add_event(p, c, 5)
+                if graph.add_edge(p, a, AUTHORED) >= 0:
+                    edge_pair.append(pair)
 
         # Process Supporters
         for s in supporters:
@@ -182,177 +276,335 @@ def generate_gexf():
                 continue
                 
             s_slug = s.get('id') or slugify(s_name)
-            s_id = f"prs-{s_slug}"
-            
-            if s_id not in nodes:
-                nodes[s_id] = {
-                    'label': s_name, 
-                    'type': 'prs', 
-                    'kv': s.get('kv', '')
-                }
-            
-            amendment_supporters_count[aid] += 1
-            
-            # Track stats for person weight
-            if s_id not in person_convention_stats:
-                person_convention_stats[s_id] = {}
-            if convention not in person_convention_stats[s_id]:
-                person_convention_stats[s_id][convention] = {'supports': 0, 'authored': 0}
-            person_convention_stats[s_id][convention]['supports'] += 1
-            
-            edge_key = (s_id, aid)
-            if edge_key not in seen_edges:
-                raw_connections.append({
-                    'source': s_id, 
-                    'target': aid, 
-                    'type': 'supports',
-                    'convention': convention
-                })
-                seen_edges.add(edge_key)
-                connected_nodes.add(s_id)
-                connected_nodes.add(aid)
-
-    # Calculate final person weights based on the new formula
-    # pid -> cid -> weight
-    person_convention_weights = {}
-    # pid -> sum of weights
-    person_sum_weights = {}
-    # pid -> weighted date average
-    person_weighted_date_avg = {}
-    
-    for pid, convs in person_convention_stats.items():
-        person_convention_weights[pid] = {}
-        total_w = 0
-        weighted_date_sum = 0
-        
-        for cid, stats in convs.items():
-            # Formula: prsconventionweight = cube root of (supported + 5 * authored)
-            w = math.pow(stats['supports'] + 5 * stats['authored'], 1/3)
-            person_convention_weights[pid][cid] = w
-            
-            total_w += w
-            conv_year = get_conv_year(cid)
-            weighted_date_sum += w * conv_year
-            
-        person_sum_weights[pid] = total_w
-        if total_w > 0:
-            person_weighted_date_avg[pid] = weighted_date_sum / total_w
-        else:
-            person_weighted_date_avg[pid] = 2020.0 # Fallback
-
-    # Calculate degrees to support FILTER_SINGLE_LINK_SUPPORTERS
-    node_degrees = {}
-    for conn in raw_connections:
-        s, t = conn['source'], conn['target']
-        node_degrees[s] = node_degrees.get(s, 0) + 1
-        node_degrees[t] = node_degrees.get(t, 0) + 1
-
-    # Second pass: finalize node weights and build edges with the new weights
-    final_nodes = {}
-    for nid, ninfo in nodes.items():
-        if nid not in connected_nodes:
-            continue
-            
+            p = graph.add_person(f"prs-{s_slug}", label=s_name, kv=s.get('kv', ''))
+            support_amendment.append(a)
+            pair = add_event(p, c, 1)
+            if graph.add_edge(p, a, SUPPORTS) >= 0:
+                edge_pair.append(pair)
+
+    n_persons = len(graph.persons)
+    n_amendments = len(graph.amendments)
+    pair_person = np.array(pair_person, dtype=np.intp)
+    pair_conv = np.array(pair_conv, dtype=np.intp)
+    edge_person, edge_amendment, edge_role = graph.edges()
+    edge_pair = np.array(edge_pair, dtype=np.intp)
+    conv_years = np.array([get_conv_year(cid) for cid in convention_ids])
+
+    # Formula: prsconventionweight = cube root of (supported + 5 * authored)
+    points = np.bincount(np.array(event_pair, dtype=np.intp), weights=event_points, minlength=len(pair_person))
+    pair_weight = cube_root_weights(points)
+
+    # bincount adds in array order, and pairs are in first-seen order, so the sums
+    # accumulate in the same order as the per-person loop they replace
+    person_sum_weights = np.bincount(pair_person, weights=pair_weight, minlength=n_persons)
+    weighted_date_sum = np.bincount(pair_person, weights=pair_weight * conv_years[pair_conv], minlength=n_persons)
+    has_weight = person_sum_weights > 0
+    person_weighted_date_avg = np.full(n_persons, 2020.0)  # Fallback
+    person_weighted_date_avg[has_weight] = weighted_date_sum[has_weight] / person_sum_weights[has_weight]
+
+    # Degrees to support FILTER_SINGLE_LINK_SUPPORTERS
+    person_degree = graph.person_adjacency().degree()
+    amendment_degree = graph.amendment_adjacency().degree()
+    amendment_supporters_count = np.bincount(np.array(support_amendment, dtype=np.intp), minlength=n_amendments)
+
+    keep_person = np.ones(n_persons, dtype=bool)
+    if filter_single_link_supporters:
         # Optional Filter: Skip persons with only one connection
-        if FILTER_SINGLE_LINK_SUPPORTERS and ninfo['type'] == 'prs' and node_degrees.get(nid, 0) <= 1:
-            continue
+        keep_person &= person_degree > 1
 
-        if ninfo['type'] == 'amendment':
-            ninfo['weight'] = amendment_supporters_count.get(nid, 0)
-        else:
-            # Use total sum weight for node size visualization
-            ninfo['weight'] = 10 * round(person_sum_weights.get(nid, 0))
-        
-        final_nodes[nid] = ninfo
+    # Use total sum weight for node size visualization
+    person_node_weight = (10 * np.round(person_sum_weights)).astype(np.int64).tolist()
+    amendment_weight = amendment_supporters_count.tolist()
+    keep = keep_person.tolist()
+    amendment_connected = (amendment_degree > 0).tolist()
 
-    edges = []
-    for i, conn in enumerate(raw_connections):
-        source = conn['source']
-        target = conn['target']
-        
-        # Skip edges where source or target was filtered out
-        if source not in final_nodes or target not in final_nodes:
-            continue
+    # Second pass: node rows in first-seen order, with their final weights
+    final_nodes = []
+    person_row = np.full(n_persons, -1, dtype=np.intp)
+    amendment_row = np.full(n_amendments, -1, dtype=np.intp)
+    for code in graph.node_order:
+        i = code >> 1
+        if code & 1 == PERSON:
+            if keep[i]:
+                person_row[i] = len(final_nodes)
+                final_nodes.append((graph.persons.ids[i], graph.person_label[i], 'prs', None,
+                                    graph.person_kv[i], None, person_node_weight[i]))
+        elif amendment_connected[i]:
+            amendment_row[i] = len(final_nodes)
+            final_nodes.append((graph.amendments.ids[i], graph.amendment_label[i], 'amendment',
+                                graph.amendment_convention[i], None, graph.amendment_url[i], amendment_weight[i]))
 
-        ctype = conn['type']
-        cid = conn['convention']
-        
-        # New complex edge weight formula
-        # sum_weights = total experience across all conventions
-        total_w = person_sum_weights.get(source, 1.0)
-        # weight_in_this_conv = experience in the specific convention of the amendment
-        weight_this_conv = person_convention_weights.get(source, {}).get(cid, 1.0)
-        # weighted_date_avg = the person's "average activity year"
-        weighted_date_avg = person_weighted_date_avg.get(source, 2020.0)
-        # current_year = year of the amendment's convention
-        current_year = get_conv_year(cid)
-        
-        # Formula part 1: sqrt(total_w) / sqrt(weight_this_conv)
-        ratio = math.sqrt(total_w) / math.sqrt(max(0.001, weight_this_conv))
-        
-        # Formula part 2: (1 + 2 * weighted_date_avg / current_year)
-        temporal_factor = (1 + 2 * (weighted_date_avg / current_year))
-        
-        weight = ratio * temporal_factor
-        
-        # Apply 5x multiplier for authored edges
-        if ctype == 'authored':
-            weight *= 5.0
-            
-        edges.append({
-            'id': f"e{i}",
-            'source': source,
-            'target': target,
-            'weight': weight,
-            'type': ctype
-        })
-
-    print(f"Writing GEXF to {OUTPUT_GEXF}...")
+    # Skip edges whose person was filtered out
+    mask = keep_person[edge_person]
+    source = edge_person[mask]
+    pair = edge_pair[mask]
+
+    # Edge weight: sqrt(total experience) / sqrt(experience in the amendment's convention)
+    # times the temporal factor (1 + 2 * average activity year / convention year)
+    ratio = np.sqrt(person_sum_weights[source]) / np.sqrt(np.maximum(0.001, pair_weight[pair]))
+    temporal_factor = 1 + 2 * (person_weighted_date_avg[source] / conv_years[pair_conv[pair]])
+    weights = ratio * temporal_factor
+
+    # Apply 5x multiplier for authored edges
+    weights[edge_role[mask] == AUTHORED] *= 5.0
+
+    person_ids = graph.persons.ids
+    amendment_ids = graph.amendments.ids
+    target = edge_amendment[mask]
+    edges = (
+        [person_ids[p] for p in source.tolist()],
+        [amendment_ids[a] for a in target.tolist()],
+        weights.tolist(),
+    )
+
+    return Network(final_nodes, edges, person_row[source], amendment_row[target], weights)
+
+def node_sizes(weights, size_range=SIZE_RANGE):
+    """Maps node weights linearly onto size_range."""
+    weights = np.asarray(weights, dtype=np.float64)
+    lo, hi = size_range
+    if not len(weights) or weights.max() == weights.min():
+        return np.full(len(weights), lo)
+    return lo + (hi - lo) * (weights - weights.min()) / (weights.max() - weights.min())
+
+def layout_network(network, settings, desc="Layout", progress=True):
+    """
+    Runs ForceAtlas2 on the network with the manifest's `layout` settings (keyword arguments of forceatlas2).
+    Returns per-node (x, y, size) tuples for write_gexf.
+    """
+    with tqdm(total=settings.get('iterations', ITERATIONS), desc=desc, disable=not progress) as bar:
+        positions = forceatlas2(
+            len(network.nodes), network.source_rows, network.target_rows, network.weights,
+            progress=lambda _: bar.update(1), **settings,
+        )
+    sizes = node_sizes([node[6] for node in network.nodes])
+    return list(zip(positions[:, 0].tolist(), positions[:, 1].tolist(), sizes.tolist()))
+
+def cluster_network(network, settings):
+    """
+    Louvain communities of the network with the manifest's `clusters` settings (resolution, seed).
+    Returns per-node cluster numbers for write_gexf, largest cluster first.
+    """
+    labels = louvain(
+        len(network.nodes), network.source_rows, network.target_rows, network.weights,
+        resolution=settings.get('resolution', RESOLUTION), seed=settings.get('seed', 0),
+    )
+    return labels.tolist()
+
+def lod_path(output, level):
+    """File of a level of detail: bdk_all.gexf.gz -> bdk_all.lod1.gexf.gz."""
+    directory, name = os.path.split(output)
+    stem, dot, ext = name.partition('.')
+    return os.path.join(directory, f"{stem}.lod{level}{dot}{ext}")
+
+def write_lod(output, network, settings, viz=None, clusters=None, level=COMPRESS_LEVEL):
+    """
+    Writes the coarse levels of the manifest's `lod` settings (`grids`) next to the project's GEXF,
+    one file per level, plus an index listing every level from the overview down to the full graph.
+    Returns the index's path.
+    """
+    levels = build_levels(
+        network.nodes, network.source_rows, network.target_rows, network.weights,
+        viz, clusters, grids=settings.get('grids', LOD_GRIDS),
+    )
+    entries = [{'level': 0, 'file': os.path.basename(output), 'nodes': len(network.nodes),
+                'edges': len(network.weights), 'grid': None}]
+    for number, lod in enumerate(levels, 1):
+        path = lod_path(output, number)
+        ids = [node[0] for node in lod.nodes]
+        sources, targets, weights = lod.edges
+        lod_viz = None
+        if lod.positions is not None:
+            sizes = node_sizes([node[6] for node in lod.nodes])
+            lod_viz = list(zip(lod.positions[:, 0].tolist(), lod.positions[:, 1].tolist(), sizes.tolist()))
+        write_gexf(
+            path, lod.nodes,
+            ([ids[i] for i in sources.tolist()], [ids[i] for i in targets.tolist()], weights.tolist()),
+            level, lod_viz, lod.clusters, lod.children,
+        )
+        entries.append({'level': number, 'file': os.path.basename(path), 'nodes': len(lod.nodes),
+                        'edges': len(weights), 'grid': lod.grid if viz is not None else None})
+
+    # Drop the files of levels an earlier build had beyond these
+    stale = len(levels) + 1
+    while os.path.exists(lod_path(output, stale)):
+        os.remove(lod_path(output, stale))
+        stale += 1
+
+    index = {'levels': entries[::-1]}
+    if viz is not None:
+        x, y, span = grid_bounds(np.array([v[:2] for v in viz], dtype=np.float64))
+        index['bounds'] = {'x': x, 'y': y, 'span': span}
+    stem = os.path.basename(output).partition('.')[0]
+    index_path = os.path.join(os.path.dirname(output), f"{stem}.lod.json")
+    temp_file = index_path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_file, index_path)
+    return index_path
+
+def read_manifest(path=MANIFEST_FILE):
+    """Returns {project: settings} for the manifest entries that define conventions and an output."""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = yaml.safe_load(f) or {}
+    return {
+        name: entry for name, entry in manifest.items()
+        if isinstance(entry, dict) and entry.get('conventions') and entry.get('output')
+    }
+
+RE_MANIFEST_PROJECT = re.compile(r'^([^\s#][^:]*):\s*$')
+RE_MANIFEST_COUNT = re.compile(r'^(\s+)(nodes|edges):')
+
+def _count_lines(pending):
+    return [f"  {key}: {value}\n" for key, value in pending.items()]
+
+def update_manifest_counts(counts, path=MANIFEST_FILE):
+    """
+    Writes {project: (nodes, edges)} into the manifest's `nodes:`/`edges:` lines, adding them if missing.
+    The file is edited line by line, so comments and formatting survive.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines(keepends=True)
+    out = []
+    pending = {}  # counts of the current project not written yet
+    for line in lines:
+        header = RE_MANIFEST_PROJECT.match(line)
+        if header or (pending and line.strip() and not line[0].isspace()):
+            # A new top-level entry ends the previous project's block
+            out.extend(_count_lines(pending))
+            pending = {}
+        if header and header.group(1) in counts:
+            pending = dict(zip(('nodes', 'edges'), counts[header.group(1)]))
+        field = RE_MANIFEST_COUNT.match(line)
+        if field and field.group(2) in pending:
+            line = f"{field.group(1)}{field.group(2)}: {pending.pop(field.group(2))}\n"
+        out.append(line)
+    out.extend(_count_lines(pending))
+
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.writelines(out)
+    os.replace(temp_file, path)
+
+# Records the project workers read; inherited copy-on-write when the pool forks
+_shared_data = None
+
+def _load_shared_data():
+    """Pool initializer where workers cannot fork: each worker loads the dataset itself."""
+    global _shared_data
+    _shared_data = load_records(['convention', 'url', 'label', 'author', 'isprs', 'supporters'])
+
+def build_project(job):
+    """Process pool worker: builds and writes one project's graph. Returns (project, nodes, edges, error)."""
+    name, project, output, level, layout, clusters, progress = job
     try:
-        with open(OUTPUT_GEXF, 'w', encoding='utf-8') as f:
-            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-            f.write('<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n')
-            f.write('  <graph mode="static" defaultedgetype="directed">\n')
-            
-            # Attributes definition
-            f.write('    <attributes class="node" mode="static">\n')
-            f.write('      <attribute id="attr_type" title="type" type="string" />\n')
-            f.write('      <attribute id="attr_convention" title="convention" type="string" />\n')
-            f.write('      <attribute id="attr_kv" title="kv" type="string" />\n')
-            f.write('      <attribute id="attr_url" title="url" type="string" />\n')
-            f.write('      <attribute id="attr_weight" title="weight" type="integer" />\n')
-            f.write('    </attributes>\n')
-
-            # Nodes
-            f.write('    <nodes>\n')
-            for nid, ninfo in final_nodes.items():
-                esc_label = escape_xml(ninfo['label'])
-                f.write(f'      <node id="{nid}" label="{esc_label}">\n')
-                f.write('        <attvalues>\n')
-                f.write(f'          <attvalue for="attr_type" value="{escape_xml(ninfo.get("type", ""))}" />\n')
-                if 'convention' in ninfo:
-                    f.write(f'          <attvalue for="attr_convention" value="{escape_xml(ninfo["convention"])}" />\n')
-                if 'kv' in ninfo:
-                    f.write(f'          <attvalue for="attr_kv" value="{escape_xml(ninfo["kv"])}" />\n')
-                if 'url' in ninfo:
-                    f.write(f'          <attvalue for="attr_url" value="{escape_xml(ninfo["url"])}" />\n')
-                f.write(f'          <attvalue for="attr_weight" value="{ninfo.get("weight", 0)}" />\n')
-                f.write('        </attvalues>\n')
-                f.write('      </node>\n')
-            f.write('    </nodes>\n')
-
-            # Edges
-            f.write('    <edges>\n')
-            for i, e in enumerate(edges):
-                f.write(f'      <edge id="e{i}" source="{e["source"]}" target="{e["target"]}" weight="{e["weight"]}" />\n')
-            f.write('    </edges>\n')
-            
-            f.write('  </graph>\n')
-            f.write('</gexf>\n')
-        print(f"Success! Created {OUTPUT_GEXF} with {len(final_nodes)} nodes and {len(edges)} edges.")
-        
+        filters = project.get('filters') or {}
+        network = build_network(
+            _shared_data,
+            [str(cid) for cid in project['conventions']],
+            min_supporters=filters.get('min_supporters', MIN_SUPPORTERS),
+            filter_single_link_supporters=filters.get('single_link_supporters', FILTER_SINGLE_LINK_SUPPORTERS),
+            desc=f"{name}: Pass 1",
+            progress=progress,
+        )
+        viz = None
+        if layout and project.get('layout') is not None:
+            viz = layout_network(network, project['layout'] or {}, desc=f"{name}: Layout", progress=progress)
+        node_clusters = None
+        if clusters and project.get('clusters') is not None:
+            node_clusters = cluster_network(network, project['clusters'] or {})
+        write_gexf(output, network.nodes, network.edges, level, viz, node_clusters)
+        # Levels of detail group nodes by cluster and position, so they need at least one of them
+        if project.get('lod') is not None and (viz is not None or node_clusters is not None):
+            write_lod(output, network, project['lod'] or {}, viz, node_clusters, level)
+        if project.get('tiles') is not None and viz is not None:
+            settings = project['tiles'] or {}
+            stem = os.path.basename(output).partition('.')[0]
+            write_tiles(
+                os.path.join(os.path.dirname(output), settings.get('directory', f"{stem}.tiles")),
+                network.nodes, network.source_rows, network.target_rows, network.weights, viz, node_clusters,
+                settings.get('capacity', TILE_CAPACITY), settings.get('max_zoom', MAX_ZOOM), level,
+            )
+        if project.get('bundle'):
+            write_bundle(os.path.join(os.path.dirname(output), project['bundle']), network.nodes,
+                         network.source_rows, network.target_rows, network.weights, viz, node_clusters)
+        return name, len(network.nodes), len(network.weights), None
     except Exception as e:
-        print(f"Error writing GEXF: {e}")
+        return name, 0, 0, f"{type(e).__name__}: {e}"
+
+def generate_projects(manifest_path=MANIFEST_FILE, names=None, workers=PROJECT_WORKERS, level=COMPRESS_LEVEL,
+                      layout=True, clusters=True):
+    """
+    Loads the dataset once and builds every project of the manifest (or those in `names`),
+    one per worker process, then writes the node and edge counts back into the manifest.
+    Projects with a `layout` entry get ForceAtlas2 positions unless `layout` is False, and
+    projects with a `clusters` entry get Louvain communities unless `clusters` is False.
+    """
+    global _shared_data
+    projects = read_manifest(manifest_path)
+    unknown = sorted(set(names or ()) - set(projects))
+    if unknown:
+        print(f"Error: no project {', '.join(unknown)} with conventions and an output in {manifest_path}.")
+        return 1
+    if names:
+        projects = {name: projects[name] for name in names}
+    if not projects:
+        print(f"No projects with conventions and an output in {manifest_path}.")
+        return 1
+
+    _shared_data = load_data()
+    if _shared_data is None:
+        return 1
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    workers = max(1, min(workers, len(projects)))
+    jobs = [
+        (name, project, os.path.join(manifest_dir, project['output']), level, layout, clusters, workers == 1)
+        for name, project in projects.items()
+    ]
+    print(f"Building {len(jobs)} projects with {workers} workers...")
+    if workers == 1:
+        results = map(build_project, jobs)
+    else:
+        # Forked workers share the loaded records; elsewhere each one loads them again
+        if 'fork' in multiprocessing.get_all_start_methods():
+            pool_options = {'mp_context': multiprocessing.get_context('fork')}
+        else:
+            pool_options = {'initializer': _load_shared_data}
+        executor = ProcessPoolExecutor(max_workers=workers, **pool_options)
+        results = (future.result() for future in as_completed([executor.submit(build_project, job) for job in jobs]))
+
+    counts = {}
+    failed = 0
+    try:
+        for name, node_count, edge_count, error in results:
+            output = os.path.join(manifest_dir, projects[name]['output'])
+            if error:
+                failed += 1
+                print(f"Error building {name}: {error}")
+                continue
+            counts[name] = (node_count, edge_count)
+            print(f"Created {output} with {node_count} nodes and {edge_count} edges.")
+    finally:
+        if workers > 1:
+            executor.shutdown()
+
+    if counts:
+        update_manifest_counts(counts, manifest_path)
+        print(f"Updated node and edge counts in {manifest_path}")
+    return 1 if failed else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the project network GEXFs from the amendments dataset")
+    parser.add_argument("projects", nargs="*", help="Projects to build (default: all in the manifest)")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help="Project manifest (descriptions.yaml)")
+    parser.add_argument("--workers", type=int, default=PROJECT_WORKERS, help="Projects built in parallel")
+    parser.add_argument("--level", type=int, default=COMPRESS_LEVEL, help="Compression level")
+    parser.add_argument("--no-layout", action="store_true", help="Skip the ForceAtlas2 layout (no viz:position/viz:size)")
+    parser.add_argument("--no-clusters", action="store_true", help="Skip community detection (no cluster/viz:color)")
+    args = parser.parse_args()
+    return generate_projects(args.manifest, args.projects, args.workers, args.level,
+                             layout=not args.no_layout, clusters=not args.no_clusters)
 
 if __name__ == "__main__":
-    generate_gexf()
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import os
+import sys
+import gzip
+import json
+import time
+import struct
+import argparse
+
+import numpy as np
+
+from bipartite_graph import Interner
+
+MAGIC = b"CNGB"
+FORMAT_VERSION = 1
+# Section offsets are multiples of this, so every section can be viewed in place as a typed array
+ALIGNMENT = 8
+# Missing string (an attribute that is not set on a node)
+NA = 0xFFFFFFFF
+
+# Node columns that point into the string table, in render_node argument order
+STRING_COLUMNS = ('node_id', 'node_label', 'node_type', 'node_convention', 'node_kv', 'node_url')
+
+def _pad(length):
+    return -length % ALIGNMENT
+
+def encode_bundle(nodes, sources, targets, weights, viz=None, clusters=None):
+    """
+    Sections of a graph bundle as {name: little-endian array}.
+    `nodes` are render_node argument tuples, `sources`/`targets` are edge node rows,
+    `viz` is an optional list of per-node (x, y, size) tuples and `clusters` one of cluster numbers.
+    """
+    strings = Interner()
+    columns = {name: [] for name in STRING_COLUMNS}
+    appends = [columns[name].append for name in STRING_COLUMNS]
+    node_weight = []
+    for node in nodes:
+        for append, value in zip(appends, node):
+            append(NA if value is None else strings.add(value))
+        node_weight.append(node[6])
+
+    sections = {name: np.array(values, dtype='<u4') for name, values in columns.items()}
+    sections['node_weight'] = np.array(node_weight, dtype='<i4')
+    if viz is not None:
+        viz = np.array(viz, dtype=np.float64).reshape(-1, 3)
+        sections['node_position'] = np.ascontiguousarray(viz[:, :2], dtype='<f4')
+        sections['node_size'] = viz[:, 2].astype('<f4')
+    if clusters is not None:
+        sections['node_cluster'] = np.array(clusters, dtype='<u4')
+    sections['edge_source'] = np.asarray(sources, dtype='<u4')
+    sections['edge_target'] = np.asarray(targets, dtype='<u4')
+    sections['edge_weight'] = np.asarray(weights, dtype='<f4')
+
+    encoded = [s.encode('utf-8') for s in strings.ids]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(s) for s in encoded], out=offsets[1:])
+    sections['string_offsets'] = offsets
+    sections['strings'] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return sections
+
+def write_bundle(path, nodes, sources, targets, weights, viz=None, clusters=None):
+    """
+    Writes a graph bundle, atomically: MAGIC, version and header length, a JSON header with the
+    counts and each section's offset, dtype and shape, then the raw sections at aligned offsets.
+    """
+    sections = encode_bundle(nodes, sources, targets, weights, viz, clusters)
+    header = {'version': FORMAT_VERSION, 'nodes': len(nodes), 'edges': len(sections['edge_source']),
+              'strings': len(sections['string_offsets']) - 1, 'section': {}}
+    offset = 0
+    for name, values in sections.items():
+        header['section'][name] = {'offset': offset, 'length': values.nbytes,
+                                   'dtype': values.dtype.str, 'shape': list(values.shape)}
+        offset += values.nbytes + _pad(values.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix = len(MAGIC) + struct.calcsize("<HI")
+    header_bytes += b" " * _pad(prefix + len(header_bytes))
+
+    temp_file = path + ".tmp"
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<HI", FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for values in sections.values():
+                f.write(values.tobytes())
+                f.write(b"\0" * _pad(values.nbytes))
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    return header
+
+class GraphBundle:
+    """
+    Reader of a graph bundle. Sections are zero-copy NumPy views of the file's bytes;
+    strings are decoded on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = f.read()
+        if self.buffer[:4] != MAGIC:
+            raise ValueError(f"{path} is not a graph bundle")
+        version, header_length = struct.unpack_from("<HI", self.buffer, 4)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        start = len(MAGIC) + struct.calcsize("<HI")
+        self.header = json.loads(self.buffer[start:start + header_length])
+        self._data_start = start + header_length
+        self._strings = None
+
+    def __len__(self):
+        return self.header['nodes']
+
+    def __contains__(self, name):
+        return name in self.header['section']
+
+    def section(self, name):
+        entry = self.header['section'][name]
+        dtype = np.dtype(entry['dtype'])
+        values = np.frombuffer(self.buffer, dtype=dtype, count=entry['length'] // dtype.itemsize,
+                               offset=self._data_start + entry['offset'])
+        return values.reshape(entry['shape'])
+
+    @property
+    def strings(self):
+        if self._strings is None:
+            data = self.section('strings').tobytes()
+            offsets = self.section('string_offsets').tolist()
+            self._strings = [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def _column(self, name):
+        strings = self.strings
+        return [None if i == NA else strings[i] for i in self.section(name).tolist()]
+
+    def nodes(self):
+        """Node rows as render_node argument tuples."""
+        return list(zip(*(self._column(name) for name in STRING_COLUMNS), self.section('node_weight').tolist()))
+
+    def edges(self):
+        """Edges as (sources, targets, weights) columns of node IDs and float weights."""
+        ids = self._column('node_id')
+        return (
+            [ids[i] for i in self.section('edge_source').tolist()],
+            [ids[i] for i in self.section('edge_target').tolist()],
+            self.section('edge_weight').tolist(),
+        )
+
+    def viz(self):
+        """Per-node (x, y, size) tuples, or None without a layout."""
+        if 'node_position' not in self:
+            return None
+        position = self.section('node_position')
+        return list(zip(position[:, 0].tolist(), position[:, 1].tolist(), self.section('node_size').tolist()))
+
+    def clusters(self):
+        return self.section('node_cluster').tolist() if 'node_cluster' in self else None
+
+GEXF_NS = '{http://www.gexf.net/1.2draft}'
+VIZ_NS = '{http://www.gexf.net/1.2draft/viz}'
+GEXF_ATTRIBUTES = ('attr_type', 'attr_convention', 'attr_kv', 'attr_url')
+
+def read_gexf(path):
+    """
+    Parses a (compressed) GEXF from generate_conventions_gexf.py into the bundle's structures:
+    (nodes, edges, viz, clusters), with viz and clusters None where the file has none.
+    """
+    from lxml import etree
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        root = etree.fromstring(f.read(), etree.XMLParser(huge_tree=True))
+    nodes, viz, clusters = [], [], []
+    for node in root.iter(f'{GEXF_NS}node'):
+        values = {v.get('for'): v.get('value') for v in node.iter(f'{GEXF_NS}attvalue')}
+        nodes.append((node.get('id'), node.get('label'), *(values.get(a) for a in GEXF_ATTRIBUTES),
+                      int(values['attr_weight'])))
+        position = node.find(f'{VIZ_NS}position')
+        if position is not None:
+            viz.append((float(position.get('x')), float(position.get('y')),
+                        float(node.find(f'{VIZ_NS}size').get('value'))))
+        if 'cluster' in values:
+            clusters.append(int(values['cluster']))
+    sources, targets, weights = [], [], []
+    for edge in root.iter(f'{GEXF_NS}edge'):
+        sources.append(edge.get('source'))
+        targets.append(edge.get('target'))
+        weights.append(float(edge.get('weight')))
+    return nodes, (sources, targets, weights), viz or None, clusters or None
+
+def compare(bundle_path, gexf_path, repeat=3):
+    """Checks that the bundle holds the same graph as the GEXF and prints sizes and parse times. Returns mismatches."""
+    gexf_times, bundle_times = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        nodes, edges, viz, clusters = read_gexf(gexf_path)
+        gexf_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        bundle = GraphBundle(bundle_path)
+        sections = [bundle.section(name) for name in bundle.header['section']]
+        bundle.strings
+        bundle_times.append(time.perf_counter() - t0)
+
+    mismatches = []
+    if bundle.nodes() != nodes:
+        mismatches.append("nodes")
+    b_sources, b_targets, b_weights = bundle.edges()
+    if (b_sources, b_targets) != tuple(edges[:2]):
+        mismatches.append("edge endpoints")
+    # Float32 in the bundle; the GEXF has the full float64 repr
+    if len(b_weights) != len(edges[2]) or not np.allclose(b_weights, edges[2], rtol=1e-6, atol=0):
+        mismatches.append("edge weights")
+    b_viz = bundle.viz()
+    # The GEXF rounds positions to 3 and sizes to 4 decimals
+    if (b_viz is None) != (viz is None) or (viz and (len(b_viz) != len(viz)
+                                                     or not np.allclose(b_viz, viz, rtol=1e-6, atol=1e-3))):
+        mismatches.append("viz")
+    if bundle.clusters() != clusters:
+        mismatches.append("clusters")
+
+    with open(bundle_path, 'rb') as f:
+        bundle_gz = len(gzip.compress(f.read(), 9, mtime=0))
+    gexf_size = os.path.getsize(gexf_path)
+    print(f"{len(nodes)} nodes, {len(edges[0])} edges, {bundle.header['strings']} distinct strings, "
+          f"{len(sections)} sections")
+    print(f"GEXF:   {gexf_size / 1e6:8.2f} MB on disk, parse {min(gexf_times) * 1000:8.1f} ms")
+    print(f"Bundle: {os.path.getsize(bundle_path) / 1e6:8.2f} MB raw, {bundle_gz / 1e6:.2f} MB gzipped, "
+          f"parse {min(bundle_times) * 1000:8.1f} ms")
+    for what in mismatches:
+        print(f"  Mismatch: {what}")
+    return len(mismatches)
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks a graph bundle against its GEXF and compares size and parse time")
+    parser.add_argument("bundle", help="Graph bundle (.graph.bin)")
+    parser.add_argument("gexf", help="GEXF of the same project (.gexf or .gexf.gz)")
+    parser.add_argument("--repeat", type=int, default=3, help="Parse runs; the fastest is reported")
+    args = parser.parse_args()
+    if compare(args.bundle, args.gexf, args.repeat):
+        print("FAILED: the bundle and the GEXF differ")
+        return 1
+    print("OK: the bundle round-trips the GEXF's graph")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Grid sizes (cells per side) of the coarse levels, finest first; a final level groups by community alone
+LOD_GRIDS = (64, 16, 4)
+
+# One coarse level: render_node tuples, (source rows, target rows, weights) edges, an (n, 2) array of
+# positions (or None), cluster and child-ID lists, and the level's grid size
+Level = namedtuple("Level", ["nodes", "edges", "positions", "clusters", "children", "grid"])
+
+def grid_bounds(positions):
+    """Square bounding box (x, y, span) of the positions, as the grid cells are laid over it."""
+    lo = positions.min(axis=0)
+    span = float((positions.max(axis=0) - lo).max()) * (1 + 1e-9) or 1.0
+    return float(lo[0]), float(lo[1]), span
+
+def _groups(keys):
+    """Dense group numbers in order of first occurrence, so levels follow the node order."""
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    return rank[inverse]
+
+def aggregate_edges(groups, sources, targets, weights):
+    """
+    Edges between groups with summed weights, as (sources, targets, weights) arrays; edges inside
+    a group are dropped and both directions of a pair are merged.
+    """
+    a = groups[sources]
+    b = groups[targets]
+    keep = a != b
+    lo = np.minimum(a[keep], b[keep])
+    hi = np.maximum(a[keep], b[keep])
+    count = int(groups.max()) + 1 if len(groups) else 0
+    keys, inverse = np.unique(lo * count + hi, return_inverse=True)
+    return keys // count, keys % count, np.bincount(inverse, weights=np.asarray(weights)[keep], minlength=len(keys))
+
+def build_levels(nodes, sources, targets, weights, viz=None, clusters=None, grids=LOD_GRIDS):
+    """
+    Coarsened versions of the graph, from the first level above the full graph to the overview.
+    Nodes are grouped by cluster and by grid cell of their position; each coarser grid's cells are
+    unions of the finer grid's, so every group splits exactly into groups of the level below it.
+    A group has the summed weight of its nodes, their weighted center and the label of its
+    heaviest node; `children` lists the IDs of the groups (or nodes) it contains one level down.
+    """
+    if viz is None and clusters is None:
+        raise ValueError("level of detail needs a layout or clusters to group nodes by")
+    n = len(nodes)
+    if not n:
+        return []
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    node_weight = np.array([node[6] for node in nodes], dtype=np.float64)
+    cluster = np.zeros(n, dtype=np.int64) if clusters is None else np.asarray(clusters, dtype=np.int64)
+    # Centers are weighted by weight + 1, so weightless nodes still count
+    mass = node_weight + 1
+
+    steps = sorted(set(grids), reverse=True) if viz is not None else []
+    if clusters is not None:
+        steps.append(1)
+    if viz is not None:
+        positions = np.array(viz, dtype=np.float64).reshape(-1, 3)[:, :2]
+        x, y, span = grid_bounds(positions)
+        cells = np.minimum(((positions - (x, y)) / span * steps[0]).astype(np.int64), steps[0] - 1)
+    else:
+        cells = np.zeros((n, 2), dtype=np.int64)
+
+    levels = []
+    child_ids = [node[0] for node in nodes]
+    child_group = np.arange(n)  # group of every node one level down
+    cell_grid = steps[0] if steps else 1
+    for grid in steps:
+        # Coarser cells derive from the finer ones, which keeps the levels nested
+        cells = cells * grid // cell_grid
+        cell_grid = grid
+        groups = _groups((cluster * grid + cells[:, 0]) * grid + cells[:, 1])
+        count = int(groups.max()) + 1
+        if levels and count == len(levels[-1].nodes):
+            continue
+        level = len(levels) + 1
+
+        # Representative: the heaviest node of each group, the first one on ties
+        order = np.lexsort((np.arange(n), -node_weight, groups))
+        representative = order[np.r_[True, groups[order][1:] != groups[order][:-1]]]
+        group_weight = np.bincount(groups, weights=node_weight, minlength=count)
+        ids = [f"lod{level}-{i}" for i in range(count)]
+        group_nodes = [
+            (ids[i], nodes[r][1], 'group', None, None, None, int(w))
+            for i, (r, w) in enumerate(zip(representative.tolist(), group_weight.tolist()))
+        ]
+
+        # Children: the distinct groups of the level below, in their order
+        parent = np.zeros(int(child_group.max()) + 1, dtype=np.int64)
+        parent[child_group] = groups
+        children = [[] for _ in range(count)]
+        for child, g in enumerate(parent.tolist()):
+            children[g].append(child_ids[child])
+
+        centers = None
+        if viz is not None:
+            total = np.bincount(groups, weights=mass, minlength=count)
+            centers = np.stack([
+                np.bincount(groups, weights=positions[:, axis] * mass, minlength=count) / total for axis in (0, 1)
+            ], axis=1)
+        group_clusters = cluster[representative].tolist() if clusters is not None else None
+
+        edges = aggregate_edges(groups, sources, targets, weights)
+        levels.append(Level(group_nodes, edges, centers, group_clusters, children, grid))
+        child_ids = ids
+        child_group = groups
+    return levels
@@ -0,0 +1,180 @@
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+
+import numpy as np
+
+from graph_bundle import read_gexf
+from graph_lod import grid_bounds
+
+TILES_VERSION = 1
+# A tile is split into its four quadrants while it holds more nodes than this
+TILE_CAPACITY = 2000
+MAX_ZOOM = 8
+COMPRESS_LEVEL = 9
+INDEX_FILE = "tiles.json"
+
+RE_TILE_FILE = re.compile(r'^\d+-\d+-\d+\.json\.gz$')
+
+def leaf_tiles(positions, capacity=TILE_CAPACITY, max_zoom=MAX_ZOOM):
+    """
+    Adaptive quadtree over the positions. A tile at zoom z covers 1/2^z of the square bounds per side;
+    it is a leaf once it holds at most `capacity` nodes or z reaches `max_zoom`.
+    Returns the bounds (x, y, span) and each node's leaf tile as (zoom, x, y) arrays.
+    """
+    bounds = grid_bounds(positions)
+    x, y, span = bounds
+    grid = 1 << max_zoom
+    cells = np.minimum(((positions - (x, y)) / span * grid).astype(np.int64), grid - 1)
+    n = len(positions)
+    zoom = np.full(n, -1, dtype=np.int64)
+    for z in range(max_zoom + 1):
+        open_nodes = np.flatnonzero(zoom < 0)
+        if not len(open_nodes):
+            break
+        tile = cells[open_nodes] >> (max_zoom - z)
+        _, inverse, counts = np.unique(tile[:, 0] << 32 | tile[:, 1], return_inverse=True, return_counts=True)
+        # Tiles are nested, so a tile small enough at zoom z takes all of its nodes with it
+        small = (counts[inverse] <= capacity) | (z == max_zoom)
+        zoom[open_nodes[small]] = z
+    shift = max_zoom - zoom
+    return bounds, zoom, cells[:, 0] >> shift, cells[:, 1] >> shift
+
+def _extent(x, y):
+    return [float(x.min()), float(y.min()), float(x.max()), float(y.max())]
+
+def build_tiles(nodes, sources, targets, weights, viz, clusters=None, capacity=TILE_CAPACITY, max_zoom=MAX_ZOOM):
+    """
+    Splits a laid-out graph into leaf tiles. `nodes` are render_node tuples, `sources`/`targets`
+    edge node rows and `viz` per-node (x, y, size) tuples.
+    Returns (bounds, {(zoom, x, y): shard}); a shard holds the tile's nodes in graph order and
+    every edge with an endpoint in the tile, so edges crossing tiles are in both shards.
+    """
+    # Rounded as in the GEXF's viz elements, so tiles built from a GEXF and from its layout are identical
+    viz = np.array([(float(f"{x:.3f}"), float(f"{y:.3f}"), float(f"{size:.4f}")) for x, y, size in viz],
+                   dtype=np.float64).reshape(-1, 3)
+    if not len(viz):
+        return (0.0, 0.0, 1.0), {}
+    positions = viz[:, :2]
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    bounds, zoom, tx, ty = leaf_tiles(positions, capacity, max_zoom)
+
+    # Tile key per node, sortable as (zoom, x, y)
+    key = zoom << 58 | tx << 29 | ty
+    tiles, tile_of = np.unique(key, return_inverse=True)
+    node_order = np.argsort(tile_of, kind='stable')
+    node_starts = np.searchsorted(tile_of[node_order], np.arange(len(tiles) + 1))
+
+    # Each edge once per distinct tile of its endpoints, in edge order within a tile
+    edge_tile = np.concatenate([tile_of[sources], tile_of[targets]])
+    edge_index = np.concatenate([np.arange(len(sources)), np.arange(len(sources))])
+    crossing = np.r_[np.ones(len(sources), dtype=bool), tile_of[sources] != tile_of[targets]]
+    edge_tile, edge_index = edge_tile[crossing], edge_index[crossing]
+    edge_order = np.lexsort((edge_index, edge_tile))
+    edge_starts = np.searchsorted(edge_tile[edge_order], np.arange(len(tiles) + 1))
+
+    ids = [node[0] for node in nodes]
+    x, y, span = bounds
+    shards = {}
+    for t, packed in enumerate(tiles.tolist()):
+        z, col, row = packed >> 58, packed >> 29 & (1 << 29) - 1, packed & (1 << 29) - 1
+        size = span / (1 << z)
+        members = node_order[node_starts[t]:node_starts[t + 1]]
+        edges = edge_index[edge_order[edge_starts[t]:edge_starts[t + 1]]]
+        shards[(z, col, row)] = {
+            'tile': [z, col, row],
+            'bounds': [x + col * size, y + row * size, x + (col + 1) * size, y + (row + 1) * size],
+            'extent': _extent(positions[members, 0], positions[members, 1]),
+            'nodes': {
+                'id': [ids[i] for i in members.tolist()],
+                'label': [nodes[i][1] for i in members.tolist()],
+                'type': [nodes[i][2] for i in members.tolist()],
+                'weight': [nodes[i][6] for i in members.tolist()],
+                'x': viz[members, 0].tolist(),
+                'y': viz[members, 1].tolist(),
+                'size': viz[members, 2].tolist(),
+                **({'cluster': [clusters[i] for i in members.tolist()]} if clusters is not None else {}),
+            },
+            'edges': {
+                'source': [ids[i] for i in sources[edges].tolist()],
+                'target': [ids[i] for i in targets[edges].tolist()],
+                'weight': weights[edges].tolist(),
+            },
+        }
+    return bounds, shards
+
+def tile_name(tile):
+    return "{}-{}-{}.json.gz".format(*tile)
+
+def write_tiles(directory, nodes, sources, targets, weights, viz, clusters=None,
+                capacity=TILE_CAPACITY, max_zoom=MAX_ZOOM, level=COMPRESS_LEVEL):
+    """
+    Writes one gzipped JSON shard per leaf tile plus the tile index (tiles.json) into `directory`.
+    A shard whose content hash is unchanged is left untouched, and shards of tiles that no longer
+    exist are removed. Returns the index.
+    """
+    bounds, shards = build_tiles(nodes, sources, targets, weights, viz, clusters, capacity, max_zoom)
+    os.makedirs(directory, exist_ok=True)
+    old_index = {}
+    index_path = os.path.join(directory, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            old_index = {t['file']: t['sha256'] for t in json.load(f).get('tiles', [])}
+
+    entries = []
+    for tile, shard in sorted(shards.items()):
+        raw = json.dumps(shard, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        name = tile_name(tile)
+        path = os.path.join(directory, name)
+        if old_index.get(name) != digest or not os.path.exists(path):
+            temp_file = path + ".tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(gzip.compress(raw, level, mtime=0))
+            os.replace(temp_file, path)
+        entries.append({'file': name, 'tile': list(tile), 'bounds': shard['bounds'], 'extent': shard['extent'],
+                        'nodes': len(shard['nodes']['id']), 'edges': len(shard['edges']['source']),
+                        'sha256': digest})
+
+    x, y, span = bounds
+    index = {'version': TILES_VERSION, 'bounds': {'x': x, 'y': y, 'span': span},
+             'capacity': capacity, 'max_zoom': max_zoom, 'tiles': entries}
+    temp_file = index_path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(temp_file, index_path)
+
+    current = {entry['file'] for entry in entries}
+    for name in os.listdir(directory):
+        if RE_TILE_FILE.match(name) and name not in current:
+            os.remove(os.path.join(directory, name))
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the spatial tile index of a laid-out GEXF")
+    parser.add_argument("gexf", help="GEXF with viz:position (.gexf or .gexf.gz)")
+    parser.add_argument("directory", help="Output directory for the shards and tiles.json")
+    parser.add_argument("--capacity", type=int, default=TILE_CAPACITY, help="Max nodes per tile")
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM, help="Deepest quadtree level")
+    args = parser.parse_args()
+
+    nodes, (source_ids, target_ids, weights), viz, clusters = read_gexf(args.gexf)
+    if viz is None:
+        print(f"Error: {args.gexf} has no viz:position; run the layout first.")
+        return 1
+    rows = {node[0]: i for i, node in enumerate(nodes)}
+    index = write_tiles(
+        args.directory, nodes, [rows[s] for s in source_ids], [rows[t] for t in target_ids], weights,
+        viz, clusters, args.capacity, args.max_zoom,
+    )
+    print(f"Wrote {len(index['tiles'])} tiles for {len(nodes)} nodes to {args.directory}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
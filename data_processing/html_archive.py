@@ -0,0 +1,179 @@
+import os
+import sys
+import zlib
+import hashlib
+import sqlite3
+import argparse
+import threading
+from tqdm import tqdm
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HTML_ARCHIVE = os.path.join(SCRIPT_DIR, "amendments_html.sqlite")
+AMENDMENTS_HTML_DIR = os.path.join(SCRIPT_DIR, "amendments_html")
+
+# Pages are read through a memory-mapped view of the archive file
+MMAP_SIZE = 1 << 30
+COMPRESS_LEVEL = 6
+COMMIT_EVERY = 500
+
+def aid_from_filename(filename):
+    """Maps a legacy amendments_html/ file name ({convention}__{code}.html) back to its amendment ID."""
+    return filename[:-len(".html")].replace("__", "/")
+
+class HtmlArchive:
+    """
+    Single-file store for raw amendment pages: one zlib-compressed blob per amendment ID in SQLite.
+    Replaces the one-file-per-page amendments_html/ directory.
+    """
+
+    def __init__(self, path=HTML_ARCHIVE, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "aid TEXT PRIMARY KEY,"
+                "body BLOB NOT NULL,"
+                "size INTEGER,"
+                "sha256 TEXT)"
+            )
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pages)")}
+            if "sha256" not in columns:
+                self.conn.execute("ALTER TABLE pages ADD COLUMN sha256 TEXT")
+            self.conn.commit()
+        self.conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, aid):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM pages WHERE aid = ?", (aid,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def keys(self):
+        """Returns the set of stored amendment IDs."""
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT aid FROM pages")}
+
+    def hashes(self):
+        """Returns {aid: sha256 of the raw page} without decompressing any page."""
+        with self._lock:
+            rows = self.conn.execute("SELECT aid, sha256 FROM pages").fetchall()
+        hashes = {}
+        for aid, digest in rows:
+            if digest is None:
+                # Pages archived before hashes were stored
+                digest = hashlib.sha256(self.get_bytes(aid)).hexdigest()
+                if not self.readonly:
+                    with self._lock:
+                        self.conn.execute("UPDATE pages SET sha256 = ? WHERE aid = ?", (digest, aid))
+            hashes[aid] = digest
+        return hashes
+
+    def get_bytes(self, aid):
+        with self._lock:
+            row = self.conn.execute("SELECT body FROM pages WHERE aid = ?", (aid,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def get(self, aid):
+        """Returns the page for an amendment ID as text, or None."""
+        body = self.get_bytes(aid)
+        return body.decode('utf-8') if body is not None else None
+
+    def put(self, aid, body):
+        """Stores (or replaces) the page for an amendment ID."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        blob = zlib.compress(body, COMPRESS_LEVEL)
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (aid, body, size, sha256) VALUES (?, ?, ?, ?)",
+                (aid, blob, len(body), digest),
+            )
+            self._maybe_commit()
+
+    def rename(self, old_aid, new_aid):
+        """Moves a page to a new amendment ID, replacing any page already stored there."""
+        if old_aid == new_aid:
+            return
+        with self._lock:
+            self.conn.execute("DELETE FROM pages WHERE aid = ? AND EXISTS (SELECT 1 FROM pages WHERE aid = ?)",
+                              (new_aid, old_aid))
+            self.conn.execute("UPDATE pages SET aid = ? WHERE aid = ?", (new_aid, old_aid))
+            self._maybe_commit()
+
+    def delete(self, aid):
+        with self._lock:
+            self.conn.execute("DELETE FROM pages WHERE aid = ?", (aid,))
+            self._maybe_commit()
+
+    def _maybe_commit(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        if not self.readonly:
+            self.commit()
+        self.conn.close()
+
+def import_directory(archive, directory=AMENDMENTS_HTML_DIR, delete=False):
+    """Copies all {convention}__{code}.html files of a directory into the archive."""
+    files = sorted(f for f in os.listdir(directory) if f.endswith(".html"))
+    for filename in tqdm(files, desc="Importing HTMLs"):
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as f:
+            archive.put(aid_from_filename(filename), f.read())
+    archive.commit()
+    if delete:
+        for filename in files:
+            os.remove(os.path.join(directory, filename))
+    return len(files)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the packed amendment HTML archive")
+    parser.add_argument("--archive", default=HTML_ARCHIVE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import an amendments_html/ directory into the archive")
+    migrate.add_argument("--dir", default=AMENDMENTS_HTML_DIR)
+    migrate.add_argument("--delete", action="store_true", help="Remove the loose files after importing")
+    sub.add_parser("stats", help="Print page count and sizes")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        if not os.path.isdir(args.dir):
+            print(f"Directory not found: {args.dir}")
+            return 1
+        with HtmlArchive(args.archive) as archive:
+            count = import_directory(archive, args.dir, delete=args.delete)
+        print(f"Imported {count} pages into {args.archive}")
+    elif args.command == "stats":
+        with HtmlArchive(args.archive, readonly=True) as archive:
+            count, raw, packed = archive.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM pages"
+            ).fetchone()
+        print(f"{count} pages, {raw / 1e6:.1f} MB raw, {packed / 1e6:.1f} MB compressed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+import re
+
+import lxml.html
+from lxml import etree
+from bs4 import BeautifulSoup
+from yarl import URL
+
+# Bump whenever a parser change alters the extracted fields
+PARSER_VERSION = 1
+
+RE_ID_CLEAN = re.compile(r'[^a-z0-9-]')
+RE_MOTION_ROW = re.compile(r'motionRow\d+')
+RE_AMENDMENT_ROW = re.compile(r'amendmentRow\d+')
+RE_MOTION_LINK = re.compile(r'motionLink\d+')
+RE_AMENDMENT_TITLE = re.compile(r'amendmentTitle')
+RE_APPLICANT = re.compile(r'motionApplicant|applicant', re.I)
+RE_OPEN_PAREN = re.compile(r"\s*\(")
+RE_CLOSE_PAREN = re.compile(r"\s*\)")
+
+def slugify(text):
+    """Converts text to lowercase, replaces spaces with hyphens, and removes special characters."""
+    if not text:
+        return ""
+    text = text.lower().replace(' ', '-')
+    return RE_ID_CLEAN.sub('', text)
+
+def is_person(author_text):
+    """Applicants whose text contains '(dort beschlossen am: ...)' are bodies, not persons."""
+    return "beschlossen am:" not in author_text
+
+def split_supporter(full_text):
+    """Splits 'Name (KV)' into (name, kv)."""
+    parts = RE_OPEN_PAREN.split(full_text)
+    name = parts[0].strip()
+    kv = parts[1].strip().rstrip(")") if len(parts) > 1 else ""
+    return name, kv
+
+def split_applicant(full_text):
+    """Splits the applicant cell 'Name (KV) ...' into (name, kv)."""
+    parts = RE_OPEN_PAREN.split(full_text)
+    name = parts[0].strip()
+    kv = RE_CLOSE_PAREN.split(parts[1])[0].strip() if len(parts) > 1 else ""
+    return name, kv
+
+def motion_record(convention_id, base_u, href, prefix, title, author_text):
+    """Builds the (amendment_id, record) pair for a motion row."""
+    url = str(base_u.join(URL(href)))
+    label = f"{prefix}: {title}" if prefix else title
+    # Use prefix as code if available, otherwise title slug
+    code = prefix if prefix else slugify(title)
+    return f"{convention_id}/{code}", {
+        'convention': convention_id,
+        'url': url,
+        'label': label,
+        'author': author_text,
+        'isprs': is_person(author_text),
+        'type': 'motion'
+    }
+
+def amendment_record(convention_id, base_u, href, am_title, author_text):
+    """Builds the (amendment_id, record) pair for an amendment row."""
+    am_url = str(base_u.join(URL(href)))
+    # For amendments, am_title often contains the code like "WA-01-001"
+    am_code = am_title.split(':')[0].strip() if ':' in am_title else am_title
+    return f"{convention_id}/{am_code}", {
+        'convention': convention_id,
+        'url': am_url,
+        'label': am_title,
+        'author': author_text,
+        'isprs': is_person(author_text),
+        'type': 'amendment'
+    }
+
+def supporters_from_texts(texts):
+    """De-duplicates supporter list entries into id/name/kv dicts, keeping page order."""
+    supporters = []
+    seen = set()
+    for full_text in texts:
+        name, kv = split_supporter(full_text)
+        if name and (name, kv) not in seen:
+            seen.add((name, kv))
+            supporters.append({
+                'id': slugify(name),
+                'name': name,
+                'kv': kv
+            })
+    return supporters
+
+class Bs4Parser:
+    """Reference backend: BeautifulSoup trees with regex class searches."""
+
+    name = "bs4"
+
+    def parse_starting_page(self, html, convention_id, base_url):
+        """Parses a convention overview page into {amendment_id: record}."""
+        soup = BeautifulSoup(html, 'lxml')
+        base_u = URL(base_url)
+        records = {}
+
+        for row in soup.find_all('li', class_=RE_MOTION_ROW):
+            # Applicant is in .motionApplicant or, as on 43bdk, in p.info
+            author_text = ""
+            applicant_tag = row.find(class_=RE_APPLICANT)
+            if applicant_tag:
+                author_text = applicant_tag.get_text(strip=True)
+            else:
+                info_tag = row.find('p', class_='info')
+                if info_tag:
+                    author_text = info_tag.get_text(strip=True)
+
+            # Motions
+            link_tag = row.find('a', class_=RE_MOTION_LINK)
+            if link_tag:
+                title_tag = link_tag.find('span', class_='motionTitle')
+                title = title_tag.get_text().strip() if title_tag else "Unknown"
+                prefix_tag = link_tag.find('span', class_='motionPrefix')
+                prefix = prefix_tag.get_text().strip() if prefix_tag else ""
+                aid, record = motion_record(convention_id, base_u, link_tag.get('href'), prefix, title, author_text)
+                records[aid] = record
+
+            # Amendments are nested in the motion row
+            for am_row in row.find_all('li', class_=RE_AMENDMENT_ROW):
+                am_link_tag = am_row.find('a', class_=RE_AMENDMENT_TITLE)
+                if am_link_tag:
+                    am_applicant_tag = am_row.find(class_=RE_APPLICANT)
+                    if am_applicant_tag:
+                        am_author_text = am_applicant_tag.get_text(strip=True)
+                    else:
+                        am_info_tag = am_row.find('p', class_='info')
+                        am_author_text = am_info_tag.get_text(strip=True) if am_info_tag else ""
+                    aid, record = amendment_record(
+                        convention_id, base_u, am_link_tag.get('href'),
+                        am_link_tag.get_text().strip(), am_author_text
+                    )
+                    records[aid] = record
+
+        return records
+
+    def parse_amendment_page(self, html, default_author=""):
+        """Parses one amendment page into (applicant_details, supporters)."""
+        soup = BeautifulSoup(html, 'lxml')
+
+        section = soup.find("section", {"class": "fullList hidden"})
+        if not section:
+            section = soup.find("section", {"class": "supporters"})
+        texts = [item.get_text(" ", strip=True) for item in section.find_all("li")] if section else []
+
+        applicant_name = default_author
+        applicant_kv = ""
+        table = soup.find("table", {"class": "motionDataTable"})
+        if table:
+            applicant_row = table.find("th", string=lambda t: t and "Antragsteller" in t)
+            if applicant_row:
+                applicant_cell = applicant_row.find_next("td")
+                if applicant_cell:
+                    applicant_name, applicant_kv = split_applicant(applicant_cell.get_text(" ", strip=True))
+
+        applicant_details = {
+            'id': slugify(applicant_name),
+            'name': applicant_name,
+            'kv': applicant_kv
+        }
+        return applicant_details, supporters_from_texts(texts)
+
+# Precompiled XPath for the lxml backend; regex class checks run only on the pre-filtered candidates
+XP_MOTION_ROWS = etree.XPath("//li[contains(@class, 'motionRow')]")
+XP_AMENDMENT_ROWS = etree.XPath(".//li[contains(@class, 'amendmentRow')]")
+XP_CLASSED = etree.XPath(".//*[@class]")
+XP_INFO_P = etree.XPath(".//p[@class]")
+XP_LINKS = etree.XPath(".//a[contains(@class, 'motionLink')]")
+XP_AMENDMENT_LINKS = etree.XPath(".//a[contains(@class, 'amendmentTitle')]")
+XP_SPANS = etree.XPath(".//span[@class]")
+XP_SECTIONS = etree.XPath("//section[@class]")
+XP_TABLES = etree.XPath("//table[@class]")
+XP_ITEMS = etree.XPath(".//li")
+XP_TH = etree.XPath(".//th")
+XP_NEXT_TD = etree.XPath("(descendant::td | following::td)[1]")
+# Same strings BeautifulSoup's get_text() sees: no comments, scripts, styles or templates
+XP_TEXT = etree.XPath(
+    ".//text()[not(parent::script or parent::style or parent::template)]",
+    smart_strings=False,
+)
+HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+def _classes(el):
+    return (el.get('class') or '').split()
+
+def _has_class(el, name):
+    return name in _classes(el)
+
+def _class_matches(el, regex):
+    return regex.search(' '.join(_classes(el))) is not None
+
+def _first(elements, predicate):
+    for el in elements:
+        if predicate(el):
+            return el
+    return None
+
+def _text(el):
+    return ''.join(XP_TEXT(el))
+
+def _stripped_text(el, separator=""):
+    return separator.join(s for s in (t.strip() for t in XP_TEXT(el)) if s)
+
+def _single_string(el):
+    """Mirrors BeautifulSoup's Tag.string: the text if the element has exactly one string descendant chain."""
+    while True:
+        children = list(el)
+        if not children:
+            return el.text
+        if len(children) > 1 or el.text or children[0].tail:
+            return None
+        el = children[0]
+        if not isinstance(el.tag, str):
+            return el.text
+
+def _document(html):
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    return etree.fromstring(html, HTML_PARSER) if html.strip() else None
+
+class LxmlParser:
+    """Default backend: plain lxml.html trees queried with precompiled XPath."""
+
+    name = "lxml"
+
+    def _author_text(self, row):
+        applicant_tag = _first(XP_CLASSED(row), lambda el: _class_matches(el, RE_APPLICANT))
+        if applicant_tag is not None:
+            return _stripped_text(applicant_tag)
+        info_tag = _first(XP_INFO_P(row), lambda el: _has_class(el, 'info'))
+        return _stripped_text(info_tag) if info_tag is not None else ""
+
+    def parse_starting_page(self, html, convention_id, base_url):
+        """Parses a convention overview page into {amendment_id: record}."""
+        root = _document(html)
+        base_u = URL(base_url)
+        records = {}
+        if root is None:
+            return records
+
+        for row in XP_MOTION_ROWS(root):
+            if not _class_matches(row, RE_MOTION_ROW):
+                continue
+            author_text = self._author_text(row)
+
+            link_tag = _first(XP_LINKS(row), lambda el: _class_matches(el, RE_MOTION_LINK))
+            if link_tag is not None:
+                spans = XP_SPANS(link_tag)
+                title_tag = _first(spans, lambda el: _has_class(el, 'motionTitle'))
+                title = _text(title_tag).strip() if title_tag is not None else "Unknown"
+                prefix_tag = _first(spans, lambda el: _has_class(el, 'motionPrefix'))
+                prefix = _text(prefix_tag).strip() if prefix_tag is not None else ""
+                aid, record = motion_record(convention_id, base_u, link_tag.get('href'), prefix, title, author_text)
+                records[aid] = record
+
+            for am_row in XP_AMENDMENT_ROWS(row):
+                if not _class_matches(am_row, RE_AMENDMENT_ROW):
+                    continue
+                am_link_tag = _first(XP_AMENDMENT_LINKS(am_row), lambda el: _class_matches(el, RE_AMENDMENT_TITLE))
+                if am_link_tag is not None:
+                    aid, record = amendment_record(
+                        convention_id, base_u, am_link_tag.get('href'),
+                        _text(am_link_tag).strip(), self._author_text(am_row)
+                    )
+                    records[aid] = record
+
+        return records
+
+    def parse_amendment_page(self, html, default_author=""):
+        """Parses one amendment page into (applicant_details, supporters)."""
+        root = _document(html)
+        sections = XP_SECTIONS(root) if root is not None else []
+        section = _first(sections, lambda el: ' '.join(_classes(el)) == "fullList hidden")
+        if section is None:
+            section = _first(sections, lambda el: _has_class(el, 'supporters'))
+        texts = [_stripped_text(item, " ") for item in XP_ITEMS(section)] if section is not None else []
+
+        applicant_name = default_author
+        applicant_kv = ""
+        tables = XP_TABLES(root) if root is not None else []
+        table = _first(tables, lambda el: _has_class(el, 'motionDataTable'))
+        if table is not None:
+            applicant_row = _first(XP_TH(table), lambda el: "Antragsteller" in (_single_string(el) or ""))
+            if applicant_row is not None:
+                cells = XP_NEXT_TD(applicant_row)
+                if cells:
+                    applicant_name, applicant_kv = split_applicant(_stripped_text(cells[0], " "))
+
+        applicant_details = {
+            'id': slugify(applicant_name),
+            'name': applicant_name,
+            'kv': applicant_kv
+        }
+        return applicant_details, supporters_from_texts(texts)
+
+PARSERS = {
+    LxmlParser.name: LxmlParser,
+    Bs4Parser.name: Bs4Parser,
+}
+DEFAULT_PARSER = LxmlParser.name
+
+def get_parser(name=DEFAULT_PARSER):
+    """Returns a parser backend instance by name ('lxml' or 'bs4')."""
+    try:
+        return PARSERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown parser backend '{name}', expected one of: {', '.join(PARSERS)}")
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HTTP_CACHE_DB = os.path.join(SCRIPT_DIR, "http_cache.sqlite")
+# Validators are committed every this many writes, so an interrupted run keeps most of them
+COMMIT_EVERY = 200
+
+def content_hash(body):
+    """SHA-256 hex digest of a response body."""
+    return hashlib.sha256(body).hexdigest()
+
+class HttpCache:
+    """
+    On-disk validator cache (ETag, Last-Modified, content hash per URL) for conditional re-fetches.
+    Safe to share between the download threads and the asyncio downloader.
+    """
+
+    def __init__(self, path=HTTP_CACHE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            "url TEXT PRIMARY KEY,"
+            "etag TEXT,"
+            "last_modified TEXT,"
+            "sha256 TEXT,"
+            "fetched_at REAL)"
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _maybe_commit(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def get(self, url):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, sha256 FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'sha256': row[2]}
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match / If-Modified-Since headers for a cached URL."""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, headers, body):
+        """
+        Records the validators of a 200 response.
+        Returns True if the body differs from the cached version (i.e. the file needs rewriting).
+        """
+        digest = content_hash(body)
+        entry = self.get(url)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, sha256, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, headers.get('ETag'), headers.get('Last-Modified'), digest, time.time()),
+            )
+            self._maybe_commit()
+        return not entry or entry['sha256'] != digest
+
+    def touch(self, url):
+        """Marks a URL as revalidated after a 304."""
+        with self._lock:
+            self.conn.execute("UPDATE http_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._maybe_commit()
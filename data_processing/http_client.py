@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+from yarl import URL
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Statuses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+FetchResult = namedtuple("FetchResult", ["status", "body", "headers"])
+
+def parse_retry_after(value):
+    """Returns the delay in seconds from a Retry-After header (seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts AIMD-style:
+    additive increase on success, multiplicative decrease on 429/5xx.
+    A Retry-After from the server blocks the whole bucket until it has passed.
+    """
+
+    def __init__(self, rate=4.0, min_rate=0.5, max_rate=40.0, burst=8,
+                 increase=0.2, decrease=0.5, cooldown=2.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        # Concurrent requests usually get throttled together; only back off once per cooldown
+        self.cooldown = cooldown
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._last_decrease = now
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._tokens = 0.0
+
+class HostClient:
+    """One keep-alive aiohttp session plus its rate limiter for a single host."""
+
+    def __init__(self, host, max_connections=8, timeout=20, limiter=None):
+        self.host = host
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        connector = aiohttp.TCPConnector(
+            limit_per_host=max_connections,
+            keepalive_timeout=30,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    async def close(self):
+        await self.session.close()
+
+class PooledClient:
+    """
+    Async HTTP client keeping one pooled session per host.
+    Use as `async with PooledClient() as client: await client.get(url)`.
+    If a scraper_metrics.Metrics is given, requests, bytes, latencies, retries and throttles are recorded per host.
+    """
+
+    def __init__(self, max_connections=8, timeout=20, retries=5, limiter_options=None, metrics=None):
+        self.max_connections = max_connections
+        self.metrics = metrics
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter_options = limiter_options or {}
+        self.hosts = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        for host_client in self.hosts.values():
+            await host_client.close()
+        self.hosts = {}
+
+    def host_client(self, url):
+        host = URL(url).host
+        if host not in self.hosts:
+            self.hosts[host] = HostClient(
+                host,
+                max_connections=self.max_connections,
+                timeout=self.timeout,
+                limiter=AdaptiveRateLimiter(**self.limiter_options),
+            )
+        return self.hosts[host]
+
+    async def get(self, url, headers=None):
+        """
+        GETs a URL through the host's pool and limiter, retrying throttled and failed requests.
+        Returns a FetchResult for any final status; raises after the last failed attempt.
+        """
+        hc = self.host_client(url)
+        metrics = self.metrics
+        fetch_start = time.perf_counter()
+        for attempt in range(self.retries):
+            await hc.limiter.acquire()
+            hc.requests += 1
+            request_start = time.perf_counter()
+            try:
+                async with hc.session.get(url, headers=headers) as response:
+                    if response.status in THROTTLE_STATUSES:
+                        hc.throttled += 1
+                        if metrics:
+                            metrics.inc("http_throttled_total", host=hc.host, status=response.status)
+                        hc.limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                        if attempt == self.retries - 1:
+                            response.raise_for_status()
+                        hc.retries += 1
+                        if metrics:
+                            metrics.inc("http_retries_total", host=hc.host, reason=response.status)
+                        continue
+                    body = await response.read()
+                    hc.limiter.on_success()
+                    if metrics:
+                        now = time.perf_counter()
+                        metrics.observe("http_request_seconds", now - request_start, host=hc.host)
+                        metrics.observe("http_fetch_seconds", now - fetch_start, host=hc.host)
+                        metrics.inc("http_responses_total", host=hc.host, status=response.status)
+                        metrics.inc("http_bytes_total", len(body), host=hc.host)
+                    return FetchResult(response.status, body, response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries - 1:
+                    if metrics:
+                        metrics.inc("http_failures_total", host=hc.host, reason=type(e).__name__)
+                    raise
+                hc.retries += 1
+                if metrics:
+                    metrics.inc("http_retries_total", host=hc.host, reason=type(e).__name__)
+                # Connection-level errors: plain exponential backoff with jitter
+                await asyncio.sleep(0.5 * (2 ** attempt) * (1 + random.random()))
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+
+from html_parsers import PARSER_VERSION
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARSE_CACHE_DB = os.path.join(SCRIPT_DIR, "parse_cache.sqlite")
+
+# Least recently used results are evicted beyond this size
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# Writes per transaction; an interrupted run loses at most this many results and last_used updates
+COMMIT_EVERY = 200
+
+def cache_key(content_hash, *inputs):
+    """
+    Key of a parse result: the page's content hash, PARSER_VERSION and any
+    other parser inputs (e.g. the fallback author), so a parser change invalidates old entries.
+    """
+    extra = "\0".join(str(i) for i in inputs)
+    return hashlib.sha256(f"{PARSER_VERSION}\0{content_hash}\0{extra}".encode('utf-8')).hexdigest()
+
+class ParseCache:
+    """Persistent, size-bounded cache of parse results keyed by cache_key()."""
+
+    def __init__(self, path=PARSE_CACHE_DB, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS parse_cache ("
+            "key TEXT PRIMARY KEY,"
+            "result TEXT NOT NULL,"
+            "size INTEGER NOT NULL,"
+            "last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used ON parse_cache(last_used)")
+        self.conn.commit()
+        self._uncommitted = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # Keep what this run parsed even when it is aborted by an exception
+        self.commit()
+        self.close()
+
+    def _maybe_commit(self, rows=1):
+        self._uncommitted += rows
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def get_many(self, keys):
+        """Returns {key: result} for the cached keys and marks them as used."""
+        found = {}
+        keys = list(keys)
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            for key, result in self.conn.execute(
+                f"SELECT key, result FROM parse_cache WHERE key IN ({placeholders})", batch
+            ):
+                found[key] = json.loads(result)
+        now = time.time()
+        self.conn.executemany("UPDATE parse_cache SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+        self._maybe_commit(len(found))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, result):
+        payload = json.dumps(result, ensure_ascii=False)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO parse_cache (key, result, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload), time.time()),
+        )
+        self._maybe_commit()
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits into max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        for key, size in self.conn.execute("SELECT key, size FROM parse_cache ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM parse_cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def close(self):
+        self.commit()
+        try:
+            self.evict()
+            self.conn.commit()
+        finally:
+            self.conn.close()
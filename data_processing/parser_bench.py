@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+from html_archive import HTML_ARCHIVE, HtmlArchive
+from html_parsers import PARSERS, get_parser
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTING_PAGES_DIR = os.path.join(SCRIPT_DIR, "html_starting_pages")
+
+def load_pages(directory, limit=None):
+    """Reads saved HTML pages as (name, html) pairs, sorted by file name."""
+    if not os.path.isdir(directory):
+        return []
+    files = sorted(f for f in os.listdir(directory) if f.endswith(".html"))[:limit]
+    pages = []
+    for filename in files:
+        with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+            pages.append((filename, f.read()))
+    return pages
+
+def load_archived_pages(path, limit=None):
+    """Reads pages from the HTML archive as (amendment_id, html) pairs, sorted by ID."""
+    if not os.path.exists(path):
+        return []
+    with HtmlArchive(path, readonly=True) as archive:
+        return [(aid, archive.get(aid)) for aid in sorted(archive.keys())[:limit]]
+
+def run_backend(backend, starting_pages, amendment_pages):
+    """Parses all pages with one backend; returns (results, per-page seconds)."""
+    parser = get_parser(backend)
+    results = {}
+    timings = []
+    for filename, html in starting_pages:
+        convention_id = filename.replace(".html", "")
+        t0 = time.perf_counter()
+        results[filename] = parser.parse_starting_page(html, convention_id, f"https://antraege.gruene.de/{convention_id}/")
+        timings.append(time.perf_counter() - t0)
+    for filename, html in amendment_pages:
+        t0 = time.perf_counter()
+        results[filename] = parser.parse_amendment_page(html, "")
+        timings.append(time.perf_counter() - t0)
+    return results, timings
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Checks that all parser backends extract identical fields from saved pages and times them"
+    )
+    arg_parser.add_argument("--starting-pages", default=STARTING_PAGES_DIR)
+    arg_parser.add_argument("--archive", default=HTML_ARCHIVE, help="HTML archive with amendment pages")
+    arg_parser.add_argument("--amendments", help="Directory of saved amendment pages (instead of the archive)")
+    arg_parser.add_argument("--limit", type=int, default=2000, help="Max amendment pages to use")
+    args = arg_parser.parse_args()
+
+    starting_pages = load_pages(args.starting_pages)
+    if args.amendments:
+        amendment_pages = load_pages(args.amendments, args.limit)
+    else:
+        amendment_pages = load_archived_pages(args.archive, args.limit)
+    if not starting_pages and not amendment_pages:
+        print("No saved HTML pages found. Run pipeline_scraper.py first or pass --starting-pages/--archive.")
+        return 1
+    print(f"Using {len(starting_pages)} starting pages and {len(amendment_pages)} amendment pages")
+
+    reference = None
+    mismatches = 0
+    for backend in sorted(PARSERS, key=lambda b: b != "bs4"):
+        results, timings = run_backend(backend, starting_pages, amendment_pages)
+        print(
+            f"{backend:>5}: total {sum(timings):.2f}s, "
+            f"mean {statistics.mean(timings) * 1000:.2f} ms/page, "
+            f"median {statistics.median(timings) * 1000:.2f} ms/page"
+        )
+        if reference is None:
+            reference = results
+            continue
+        for filename, expected in reference.items():
+            if results[filename] != expected:
+                mismatches += 1
+                print(f"  Mismatch ({backend} vs bs4): {filename}")
+
+    if mismatches:
+        print(f"FAILED: {mismatches} pages differ between backends")
+        return 1
+    print("OK: all backends produced identical results")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,31 @@
 import os
+import argparse
 import requests
-import yaml
-import re
 import time
+from yarl import URL
 import asyncio
-import aiohttp
-import aiofiles
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from tqdm import tqdm
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from amendments_dataset import DATASET_FILE, write_dataset, write_yaml
+from checkpoint_journal import JOURNAL_FILE, CheckpointJournal
+from html_archive import HTML_ARCHIVE, HtmlArchive
+from html_parsers import DEFAULT_PARSER, PARSERS, get_parser
+from http_cache import HTTP_CACHE_DB, HttpCache, content_hash
+from http_client import PooledClient
+from parse_cache import PARSE_CACHE_DB, ParseCache, cache_key
+from scraper_metrics import METRICS
+
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 STARTING_PAGES_DIR = os.path.join(SCRIPT_DIR, "html_starting_pages")
-AMENDMENTS_HTML_DIR = os.path.join(SCRIPT_DIR, "amendments_html")
 YAML_FILE = os.path.join(SCRIPT_DIR, "amendments_pipeline.yaml")
+METRICS_FILE = os.path.join(SCRIPT_DIR, "scraper_metrics.json")
+# The dataset file is what downstream scripts read; the YAML is an export for humans and diffs
+EXPORT_YAML = True
 
 URLS = [
     "https://antraege.gruene.de/43bdk/",
@@ -43,7 +52,15 @@ URLS = [
 ]
 
 MAX_WORKERS = 20
-RE_ID_CLEAN = re.compile(r'[^a-z0-9-]')
+MAX_CONNECTIONS_PER_HOST = 8
+# Step 5 parses pages on a process pool; chunks amortize the IPC per task
+PARSE_WORKERS = os.cpu_count() or 1
+PARSE_CHUNK_SIZE = 64
+# Downloaded bodies waiting for a parse worker in --stream mode
+STREAM_QUEUE_SIZE = 256
+
+# Result of a parse worker; error is None or the reason the page could not be parsed
+ParseOutcome = namedtuple("ParseOutcome", ["aid", "applicant_details", "supporters", "error", "seconds"])
 
 def create_session():
     """Creates a requests Session with retry logic."""
@@ -62,37 +79,58 @@ def create_session():
 
 SESSION = create_session()
 
-def slugify(text):
-    """Converts text to lowercase, replaces spaces with hyphens, and removes special characters."""
-    if not text:
-        return ""
-    text = text.lower().replace(' ', '-')
-    return RE_ID_CLEAN.sub('', text)
+def should_refresh(convention_id, refresh_conventions):
+    """Whether already downloaded pages of a convention should be revalidated."""
+    return "*" in refresh_conventions or convention_id in refresh_conventions
 
-def download_starting_pages():
-    """Step 1: Download all starting pages."""
+def download_starting_pages(refresh_conventions=()):
+    """
+    Step 1: Download all starting pages.
+    Existing pages are skipped unless their convention is in refresh_conventions ("*" for all),
+    in which case they are revalidated with a conditional request.
+    """
     print("Step 1: Downloading starting pages...")
     os.makedirs(STARTING_PAGES_DIR, exist_ok=True)
     
     def download(url):
         convention_id = url.strip('/').split('/')[-1]
         filename = os.path.join(STARTING_PAGES_DIR, f"{convention_id}.html")
-        if os.path.exists(filename):
+        exists = os.path.exists(filename)
+        if exists and not should_refresh(convention_id, refresh_conventions):
             return  # Skip if exists
+        host = URL(url).host
         try:
-            response = SESSION.get(url, timeout=30)
+            headers = cache.conditional_headers(url) if exists else {}
+            t0 = time.perf_counter()
+            response = SESSION.get(url, timeout=30, headers=headers)
+            METRICS.observe("http_fetch_seconds", time.perf_counter() - t0, host=host)
+            METRICS.inc("http_responses_total", host=host, status=response.status_code)
+            METRICS.inc("http_bytes_total", len(response.content), host=host)
+            retries = response.raw.retries
+            if retries and retries.history:
+                METRICS.inc("http_retries_total", len(retries.history), host=host, reason="urllib3")
+            if response.status_code == 304:
+                cache.touch(url)
+                return
             response.raise_for_status()
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(response.text)
+            if cache.store(url, response.headers, response.content) or not exists:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    f.write(response.text)
         except Exception as e:
+            METRICS.inc("download_failures_total", stage="starting_pages", reason=type(e).__name__)
             print(f"Error downloading {url}: {e}")
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        list(tqdm(executor.map(download, URLS), total=len(URLS), desc="Downloading Overviews"))
+    with HttpCache(HTTP_CACHE_DB) as cache:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            list(tqdm(executor.map(download, URLS), total=len(URLS), desc="Downloading Overviews"))
 
-def extract_amendments_from_starting_pages():
-    """Step 2 & 3: Create YAML from starting pages and identify 'isprs'."""
+def extract_amendments_from_starting_pages(parser_name=DEFAULT_PARSER, parse_cache=None):
+    """
+    Step 2 & 3: Create YAML from starting pages and identify 'isprs'.
+    Pages whose content is unchanged since an earlier run are taken from parse_cache (a ParseCache).
+    """
     print("Step 2 & 3: Extracting amendments and identifying applicants...")
+    parser = get_parser(parser_name)
     all_data = {}
     
     # Create a mapping of convention_id -> base_url to handle different domains
@@ -108,313 +146,420 @@ def extract_amendments_from_starting_pages():
         convention_id = filename.replace(".html", "")
         filepath = os.path.join(STARTING_PAGES_DIR, filename)
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f.read(), 'lxml')
-            
-        # Parse logic (similar to previous script but looking for author info)
-        # We need to inspect the HTML structure for 'author'.
-        # Based on Antragsgrün, the author is often in a column or subtitle.
-        # If not found, we mark as unknown.
-        
-        # NOTE: I am making an assumption here about the structure. 
-        # I will extract what I can.
-        
-        # Rows
-        motion_rows = soup.find_all('li', class_=re.compile(r'motionRow\d+'))
-        
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+
         # Determine the correct base URL for this convention
         base_url_str = url_map.get(convention_id)
         if not base_url_str:
             # Fallback for safety, though it should be in url_map
             base_url_str = f"https://antraege.gruene.de/{convention_id}/"
-            
-        from yarl import URL
-        base_u = URL(base_url_str)
-
-        for row in motion_rows:
-            # Try to find author in the row
-            # Usually in .motionApplicant or similar?
-            # Let's look for text patterns or classes.
-            # In the user's description: "If the 'author' attribute contains '(dort beschlossen am:' it is no person."
-            # This implies the author text is visible.
-            
-            author_text = ""
-            # Heuristic: Find all text in the row and see if we can identify the applicant.
-            # Often it's in a span class="motionApplications" or similar.
-            # Let's try to grab the whole text of the row for now if specific class is missing,
-            # or better, check specific classes.
-            
-            # Common classes: motionPrefix, motionTitle, motionApplicant...
-            # If motionApplicant exists:
-            applicant_tag = row.find(class_=re.compile(r'motionApplicant|applicant', re.I))
-            if applicant_tag:
-                author_text = applicant_tag.get_text(strip=True)
-            else:
-                # Fallback to p.info (seen in 43bdk.html)
-                info_tag = row.find('p', class_='info')
-                if info_tag:
-                    author_text = info_tag.get_text(strip=True)
-            
-            # Motions
-            link_tag = row.find('a', class_=re.compile(r'motionLink\d+'))
-            if link_tag:
-                url = str(base_u.join(URL(link_tag.get('href'))))
-                title_tag = link_tag.find('span', class_='motionTitle')
-                title = title_tag.get_text().strip() if title_tag else "Unknown"
-                
-                # Check isperson
-                is_prs = True
-                if "beschlossen am:" in author_text:
-                    is_prs = False
-                
-                # ID format: {convention_id}/{code_from_label}
-                # For motions, we usually have a prefix like "WA-01"
-                prefix_tag = link_tag.find('span', class_='motionPrefix')
-                prefix = prefix_tag.get_text().strip() if prefix_tag else ""
-                label = f"{prefix}: {title}" if prefix else title
-                
-                # Use prefix as code if available, otherwise title slug
-                code = prefix if prefix else slugify(title)
-                amendment_id = f"{convention_id}/{code}"
-                
-                all_data[amendment_id] = {
-                    'convention': convention_id,
-                    'url': url,
-                    'label': label,
-                    'author': author_text,
-                    'isprs': is_prs,
-                    'type': 'motion'
-                }
-
-            # Amendments
-            # Amendments are usually nested in the motion row
-            amendment_rows = row.find_all('li', class_=re.compile(r'amendmentRow\d+'))
-            for am_row in amendment_rows:
-                am_link_tag = am_row.find('a', class_=re.compile(r'amendmentTitle'))
-                if am_link_tag:
-                    am_url = str(base_u.join(URL(am_link_tag.get('href'))))
-                    am_title = am_link_tag.get_text().strip()
-                    
-                    # Applicant for amendment?
-                    # Sometimes listed in the row too.
-                    am_applicant_tag = am_row.find(class_=re.compile(r'motionApplicant|applicant', re.I))
-                    if am_applicant_tag:
-                        am_author_text = am_applicant_tag.get_text(strip=True)
-                    else:
-                        am_info_tag = am_row.find('p', class_='info')
-                        am_author_text = am_info_tag.get_text(strip=True) if am_info_tag else ""
-                    
-                    am_is_prs = True
-                    if "beschlossen am:" in am_author_text:
-                        am_is_prs = False
-                        
-                    # For amendments, am_title often contains the code like "WA-01-001"
-                    # We'll use the title as the code, but we might need to clean it
-                    am_code = am_title.split(':')[0].strip() if ':' in am_title else am_title
-                    am_id = f"{convention_id}/{am_code}"
-                    
-                    all_data[am_id] = {
-                        'convention': convention_id,
-                        'url': am_url,
-                        'label': am_title,
-                        'author': am_author_text,
-                        'isprs': am_is_prs,
-                        'type': 'amendment'
-                    }
-
-    save_yaml(all_data)
+
+        key = cache_key(content_hash(raw), "starting_page", convention_id, base_url_str)
+        records = parse_cache.get(key) if parse_cache else None
+        if records is None:
+            with METRICS.timer("parse_seconds", page="starting_page"):
+                records = parser.parse_starting_page(raw.decode('utf-8'), convention_id, base_url_str)
+            if parse_cache:
+                parse_cache.put(key, records)
+        else:
+            METRICS.inc("parse_cache_hits_total", page="starting_page")
+        all_data.update(records)
+
+    save_snapshot(all_data)
     return all_data
 
-async def download_amendment_htmls_async(data):
-    """Step 4: Download HTMLs for 'isprs' amendments asynchronously."""
+async def download_amendment_htmls_async(data, refresh_conventions=()):
+    """Step 4: Download HTMLs for 'isprs' amendments asynchronously into the HTML archive."""
     print("Step 4: Downloading amendment HTMLs (Async)...")
-    os.makedirs(AMENDMENTS_HTML_DIR, exist_ok=True)
-    
-    items_to_download = [
-        (aid, info['url']) for aid, info in data.items() 
-        if info.get('isprs', False)
-    ]
-    
-    # Filter out existing files first to avoid unnecessary tasks
-    to_do = []
-    for aid, url in items_to_download:
-        # Use safe filename for checking existence
-        safe_aid = aid.replace("/", "__")
-        filename = os.path.join(AMENDMENTS_HTML_DIR, f"{safe_aid}.html")
-        if not os.path.exists(filename):
-            to_do.append((aid, url))
-    
-    if not to_do:
-        print("All amendment HTMLs already exist.")
-        return
 
-    import random
-    
-    # Low concurrency to avoid IP-level blocks, but fresh sessions to avoid session limits
-    semaphore = asyncio.Semaphore(8) 
-    
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Mobile/15E148 Safari/604.1"
-    ]
+    with HtmlArchive(HTML_ARCHIVE) as archive:
+        existing = archive.keys()
+
+        # Filter out archived pages first to avoid unnecessary tasks,
+        # except for conventions that are revalidated
+        to_do = [
+            (aid, info['url']) for aid, info in data.items()
+            if info.get('isprs', False)
+            and (aid not in existing or should_refresh(info.get('convention'), refresh_conventions))
+        ]
 
-    async def fetch_fresh(aid, url, pbar):
-        safe_aid = aid.replace("/", "__")
-        filename = os.path.join(AMENDMENTS_HTML_DIR, f"{safe_aid}.html")
-        for attempt in range(5):
+        if not to_do:
+            print("All amendment HTMLs already exist.")
+            return
+
+        async def fetch(client, aid, url, pbar):
+            exists = aid in existing
             try:
-                async with semaphore:
-                    # New session and random UA for EVERY request to stay "fresh"
-                    ua = random.choice(user_agents)
-                    headers = {"User-Agent": ua, "Connection": "close"} # Connection: close helps reset state
-                    
-                    async with aiohttp.ClientSession(headers=headers) as session:
-                        async with session.get(url, timeout=20) as response:
-                            if response.status == 404:
-                                pbar.update(1)
-                                return
-                            if response.status == 429:
-                                raise aiohttp.ClientResponseError(
-                                    response.request_info, response.history,
-                                    status=429, message="Too Many Requests"
-                                )
-                            
-                            response.raise_for_status()
-                            content = await response.read()
-                            async with aiofiles.open(filename, mode='wb') as f:
-                                await f.write(content)
-                            pbar.update(1)
-                            return
+                headers = cache.conditional_headers(url) if exists else {}
+                result = await client.get(url, headers=headers)
+                if result.status == 304:
+                    cache.touch(url)
+                elif result.status == 200:
+                    if cache.store(url, result.headers, result.body) or not exists:
+                        archive.put(aid, result.body)
             except Exception as e:
-                status = getattr(e, 'status', None)
-                if status == 429:
-                    wait_time = (2 ** attempt) + 10 # Aggressive wait on 429
-                    await asyncio.sleep(wait_time)
-                elif attempt == 4:
-                    pbar.update(1)
-                else:
-                    await asyncio.sleep(2)
+                METRICS.inc("download_failures_total", stage="amendment_pages", reason=type(e).__name__)
+                pbar.write(f"Error downloading {url}: {e}")
+            pbar.update(1)
 
-    # No batching needed here as we use fresh sessions per request
-    with tqdm(total=len(to_do), desc="Downloading HTMLs (Fresh Mode)") as pbar:
-        tasks = [fetch_fresh(aid, url, pbar) for aid, url in to_do]
-        await asyncio.gather(*tasks)
+        # One keep-alive pool and adaptive rate limiter per host instead of a fresh session per request
+        with HttpCache(HTTP_CACHE_DB) as cache:
+            async with PooledClient(max_connections=MAX_CONNECTIONS_PER_HOST, metrics=METRICS) as client:
+                with tqdm(total=len(to_do), desc="Downloading HTMLs") as pbar:
+                    tasks = [fetch(client, aid, url, pbar) for aid, url in to_do]
+                    await asyncio.gather(*tasks)
 
-def download_amendment_htmls(data):
+def download_amendment_htmls(data, refresh_conventions=()):
     """Wrapper to run the async downloader."""
-    asyncio.run(download_amendment_htmls_async(data))
+    asyncio.run(download_amendment_htmls_async(data, refresh_conventions))
+
+def parse_amendment_html(job):
+    """
+    Process pool worker: parses one amendment page given as (aid, html, default_author, parser_name).
+    Returns a ParseOutcome; if the page could not be parsed, its error names the exception.
+    """
+    aid, html, default_author, parser_name = job
+    t0 = time.perf_counter()
+    try:
+        applicant_details, supporters = get_parser(parser_name).parse_amendment_page(html, default_author)
+        return ParseOutcome(aid, applicant_details, supporters, None, time.perf_counter() - t0)
+    except Exception as e:
+        return ParseOutcome(aid, None, None, type(e).__name__, time.perf_counter() - t0)
+
+# Read-only archive connections of the parse worker processes, by archive path
+_worker_archives = {}
+
+def parse_archived_page(job):
+    """Process pool worker: like parse_amendment_html, but reads the page from the HTML archive."""
+    aid, archive_path, default_author, parser_name = job
+    try:
+        if archive_path not in _worker_archives:
+            _worker_archives[archive_path] = HtmlArchive(archive_path, readonly=True)
+        html = _worker_archives[archive_path].get(aid)
+    except Exception as e:
+        return ParseOutcome(aid, None, None, f"archive_{type(e).__name__}", 0.0)
+    if html is None:
+        return ParseOutcome(aid, None, None, "missing_page", 0.0)
+    return parse_amendment_html((aid, html, default_author, parser_name))
 
-def extract_supporters_and_update_yaml(data):
-    """Step 5: Extract supporters from HTMLs and update YAML."""
+def resume_from_journal(data, journal, page_hashes):
+    """
+    Applies the parse results of an interrupted run whose page hash still matches the archived
+    page in page_hashes; returns the set of amendment IDs already done.
+    Entries for pages that changed since (e.g. re-fetched with --refresh) are left to be parsed again.
+    """
+    resumed = journal.replay()
+    done = set()
+    for aid, (page_hash, applicant_details, supporters) in resumed.items():
+        if aid in data and page_hash is not None and page_hashes.get(aid) == page_hash:
+            apply_parse_result(data, (aid, applicant_details, supporters))
+            done.add(aid)
+    if resumed:
+        print(f"Resuming: restored {len(done)} parsed pages from {journal.path}, "
+              f"{len(resumed) - len(done)} stale entries are parsed again")
+    return done
+
+def finish_journal(data, journal):
+    """Compacts the journal into the final snapshot and drops it once the snapshot is safely written."""
+    journal.close()
+    if save_snapshot(data):
+        journal.clear()
+
+def apply_parse_result(data, result):
+    """Writes one (aid, applicant_details, supporters, ...) parse result into the dataset. Returns False if the page could not be parsed."""
+    aid, applicant_details, supporters = result[:3]
+    if applicant_details is None:
+        return False
+    data[aid]['applicant_details'] = applicant_details
+    data[aid]['supporters'] = supporters
+    return True
+
+def record_parse_outcome(outcome):
+    """Counts a worker's ParseOutcome into METRICS."""
+    METRICS.observe("parse_seconds", outcome.seconds, page="amendment")
+    if outcome.error:
+        METRICS.inc("parse_failures_total", reason=outcome.error)
+    else:
+        METRICS.inc("pages_parsed_total")
+
+def checkpoint(journal, outcome, page_hash):
+    """Journals a successful parse result of the page with page_hash, timing the append (and the fsync every journal.flush_every entries)."""
+    with METRICS.timer("checkpoint_seconds", kind="journal"):
+        journal.append(outcome.aid, page_hash, outcome.applicant_details, outcome.supporters)
+
+def amendment_cache_key(page_hash, default_author):
+    return cache_key(page_hash, "amendment_page", default_author)
+
+def apply_cached_results(data, candidates, parse_cache):
+    """
+    Applies cached parse results for (aid, page_hash, default_author) candidates.
+    Returns ({aid: cache key} for the candidates, set of aids served from the cache).
+    """
+    keys = {aid: amendment_cache_key(page_hash, author) for aid, page_hash, author in candidates}
+    if not parse_cache:
+        return keys, set()
+    cached = parse_cache.get_many(keys.values())
+    METRICS.inc("parse_cache_hits_total", len(cached), page="amendment")
+    hits = set()
+    for aid, key in keys.items():
+        if key in cached:
+            applicant_details, supporters = cached[key]
+            apply_parse_result(data, (aid, applicant_details, supporters))
+            hits.add(aid)
+    return keys, hits
+
+def extract_supporters_and_update_yaml(data, workers=PARSE_WORKERS, chunk_size=PARSE_CHUNK_SIZE,
+                                       parser_name=DEFAULT_PARSER, parse_cache=None):
+    """
+    Step 5: Extract supporters from the archived HTMLs and update YAML.
+    Pages are parsed on a pool of `workers` processes (serially if workers <= 1);
+    results are merged in dataset order, so the output does not depend on the worker count.
+    Pages whose content hash is in parse_cache (a ParseCache) are not parsed again.
+    """
     print("Step 5: Extracting supporters...")
-    
-    updates_count = 0
-    
-    for aid, info in tqdm(data.items(), desc="Processing HTMLs"):
-        if not info.get('isprs', False):
-            continue
-            
-        safe_aid = aid.replace("/", "__")
-        filename = os.path.join(AMENDMENTS_HTML_DIR, f"{safe_aid}.html")
-        if not os.path.exists(filename):
-            continue
-            
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f.read(), 'lxml')
-                
-            # Extract Applicant Details (Name/KV) if missing or partial
-            # Extract Supporters
-            supporters = []
-            
-            # Find supporters section
-            section = soup.find("section", {"class": "fullList hidden"})
-            if not section:
-                section = soup.find("section", {"class": "supporters"})
-            
-            if section:
-                items = section.find_all("li")
-                seen = set()
-                for item in items:
-                    full_text = item.get_text(" ", strip=True)
-                    # Split Name (KV)
-                    parts = re.split(r"\s*\(", full_text)
-                    name = parts[0].strip()
-                    kv = parts[1].strip().rstrip(")") if len(parts) > 1 else ""
-                    
-                    if name and (name, kv) not in seen:
-                        seen.add((name, kv))
-                        supporter_id = slugify(name)
-                        supporters.append({
-                            'id': supporter_id,
-                            'name': name,
-                            'kv': kv
-                        })
-            
-            # Also extract accurate applicant info from the page
-            applicant_name = info.get('author', "")
-            applicant_kv = ""
-            
-            table = soup.find("table", {"class": "motionDataTable"})
-            if table:
-                applicant_row = table.find("th", string=lambda t: t and "Antragsteller" in t)
-                if applicant_row:
-                    applicant_cell = applicant_row.find_next("td")
-                    if applicant_cell:
-                        full_text = applicant_cell.get_text(" ", strip=True)
-                        parts = re.split(r"\s*\(", full_text)
-                        applicant_name = parts[0].strip()
-                        if len(parts) > 1:
-                            applicant_kv = re.split(r"\s*\)", parts[1])[0].strip()
-
-            # Update Data
-            data[aid]['applicant_details'] = {
-                'id': slugify(applicant_name),
-                'name': applicant_name,
-                'kv': applicant_kv
-            }
-            data[aid]['supporters'] = supporters
+
+    if not os.path.exists(HTML_ARCHIVE):
+        print(f"HTML archive not found: {HTML_ARCHIVE}")
+        return
+    with HtmlArchive(HTML_ARCHIVE) as archive:
+        page_hashes = archive.hashes()
+
+    journal = CheckpointJournal(JOURNAL_FILE)
+    done = resume_from_journal(data, journal, page_hashes)
+    candidates = [
+        (aid, page_hashes[aid], info.get('author', ""))
+        for aid, info in data.items()
+        if info.get('isprs', False) and aid in page_hashes and aid not in done
+    ]
+    keys, cached = apply_cached_results(data, candidates, parse_cache)
+    if parse_cache:
+        print(f"Parse cache: {len(cached)} unchanged pages, {len(candidates) - len(cached)} to parse")
+    jobs = [
+        (aid, HTML_ARCHIVE, author, parser_name)
+        for aid, _, author in candidates
+        if aid not in cached
+    ]
+
+    updates_count = len(done) + len(cached)
+
+    def merge(results):
+        nonlocal updates_count
+        for outcome in tqdm(results, total=len(jobs), desc="Processing HTMLs"):
+            record_parse_outcome(outcome)
+            if not apply_parse_result(data, outcome):
+                continue
+            checkpoint(journal, outcome, page_hashes[outcome.aid])
+            if parse_cache:
+                parse_cache.put(keys[outcome.aid], [outcome.applicant_details, outcome.supporters])
             updates_count += 1
 
-            if updates_count % 500 == 0:
-                save_yaml(data)
-                print(f" (Auto-saved at {updates_count} updates)")
+    if workers <= 1:
+        merge(map(parse_archived_page, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            merge(executor.map(parse_archived_page, jobs, chunksize=chunk_size))
 
+    print(f"Updated {updates_count} entries with supporters.")
+    finish_journal(data, journal)
+
+async def stream_amendments_async(data, refresh_conventions=(), workers=PARSE_WORKERS,
+                                  parser_name=DEFAULT_PARSER, persist_html=True,
+                                  queue_size=STREAM_QUEUE_SIZE, parse_cache=None):
+    """
+    Steps 4 & 5 as one streaming stage.
+    Downloaded bodies go through a bounded queue straight to the parse pool and are merged
+    into the dataset as they arrive; raw HTML is written to the archive in the background.
+    Pages that are already archived (and not being refreshed) are fed from the archive instead,
+    unless their parse result is already in parse_cache.
+    """
+    print("Step 4 & 5: Streaming amendment HTMLs into the parser...")
+
+    # Bounded so that downloads pause instead of piling up bodies when parsing falls behind
+    queue = asyncio.Queue(maxsize=queue_size)
+    loop = asyncio.get_running_loop()
+    pending_writes = set()
+
+    def cached_result(aid, page_hash, author):
+        """Applies a cached parse result; returns False on a cache miss."""
+        if not parse_cache:
+            return False
+        _, hits = apply_cached_results(data, [(aid, page_hash, author)], parse_cache)
+        return bool(hits)
+
+    async def produce(client, aid, url, convention_id, author, pbar):
+        nonlocal updates_count
+        exists = aid in page_hashes
+        body = None
+        try:
+            if exists and not should_refresh(convention_id, refresh_conventions):
+                if cached_result(aid, page_hashes[aid], author):
+                    updates_count += 1
+                    pbar.update(1)
+                    return
+                body = archive.get_bytes(aid)
+            else:
+                headers = cache.conditional_headers(url) if exists else {}
+                result = await client.get(url, headers=headers)
+                if result.status == 304:
+                    cache.touch(url)
+                    if not cached_result(aid, page_hashes[aid], author):
+                        body = archive.get_bytes(aid)
+                elif result.status == 200:
+                    # Validators are only stored for bodies that get archived; otherwise a later 304
+                    # would have the stale archived page parsed as current
+                    if persist_html and (cache.store(url, result.headers, result.body) or not exists):
+                        task = loop.run_in_executor(None, archive.put, aid, result.body)
+                        pending_writes.add(task)
+                        task.add_done_callback(pending_writes.discard)
+                    if not cached_result(aid, content_hash(result.body), author):
+                        body = result.body
+                if body is None and result.status in (200, 304):
+                    updates_count += 1
         except Exception as e:
-            # print(f"Error processing {filename}: {e}")
-            pass
+            METRICS.inc("download_failures_total", stage="amendment_pages", reason=type(e).__name__)
+            pbar.write(f"Error downloading {url}: {e}")
+        if body is None:
+            pbar.update(1)
+            return
+        await queue.put(((aid, body.decode('utf-8', errors='replace'), author, parser_name), content_hash(body)))
+
+    async def consume(executor, pbar):
+        nonlocal updates_count
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            job, page_hash = item
+            outcome = await loop.run_in_executor(executor, parse_amendment_html, job)
+            record_parse_outcome(outcome)
+            if apply_parse_result(data, outcome):
+                checkpoint(journal, outcome, page_hash)
+                if parse_cache:
+                    parse_cache.put(amendment_cache_key(page_hash, job[2]), [outcome.applicant_details, outcome.supporters])
+                updates_count += 1
+            pbar.update(1)
+
+    consumers_count = max(1, workers) * 2
+    journal = CheckpointJournal(JOURNAL_FILE)
+    with HtmlArchive(HTML_ARCHIVE) as archive, HttpCache(HTTP_CACHE_DB) as cache, \
+            ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        page_hashes = archive.hashes()
+        done = resume_from_journal(data, journal, page_hashes)
+        updates_count = len(done)
+        items = [
+            (aid, info['url'], info.get('convention'), info.get('author', ""))
+            for aid, info in data.items()
+            if info.get('isprs', False) and aid not in done
+        ]
+        async with PooledClient(max_connections=MAX_CONNECTIONS_PER_HOST, metrics=METRICS) as client:
+            with tqdm(total=len(items), desc="Downloading & parsing HTMLs") as pbar:
+                consumers = [asyncio.create_task(consume(executor, pbar)) for _ in range(consumers_count)]
+                await asyncio.gather(*[
+                    produce(client, aid, url, convention_id, author, pbar)
+                    for aid, url, convention_id, author in items
+                ])
+                for _ in consumers:
+                    await queue.put(None)
+                await asyncio.gather(*consumers)
+        if pending_writes:
+            await asyncio.gather(*pending_writes)
 
     print(f"Updated {updates_count} entries with supporters.")
-    save_yaml(data)
+    finish_journal(data, journal)
+
+def stream_amendments(data, refresh_conventions=(), workers=PARSE_WORKERS, parser_name=DEFAULT_PARSER,
+                      persist_html=True, parse_cache=None):
+    """Wrapper to run the streaming download→parse stage."""
+    asyncio.run(stream_amendments_async(data, refresh_conventions, workers, parser_name, persist_html,
+                                        parse_cache=parse_cache))
 
-def save_yaml(data):
-    """Atomic YAML save."""
-    temp_file = YAML_FILE + ".tmp"
+def save_snapshot(data):
+    """Atomically writes the YAML export (if EXPORT_YAML) and then the dataset file stamped with it. Returns True on success."""
     try:
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, allow_unicode=True, sort_keys=False, width=1000)
-        
-        if os.path.exists(YAML_FILE):
-            os.remove(YAML_FILE)
-        os.rename(temp_file, YAML_FILE)
+        with METRICS.timer("checkpoint_seconds", kind="snapshot"):
+            # The YAML goes first, so the dataset can record which export it matches
+            if EXPORT_YAML:
+                write_yaml(data, YAML_FILE)
+            write_dataset(data, DATASET_FILE, YAML_FILE if EXPORT_YAML else None)
+        return True
     except Exception as e:
-        print(f"Error saving YAML: {e}")
+        METRICS.inc("checkpoint_failures_total", kind="snapshot", reason=type(e).__name__)
+        print(f"Error saving snapshot: {e}")
+        return False
 
-def main():
-    # 1. Download Starting Pages
-    download_starting_pages()
-    
-    # 2 & 3. Extract to YAML
-    data = extract_amendments_from_starting_pages()
-    
-    # 4. Download HTMLs
-    download_amendment_htmls(data)
-    
-    # 5. Extract Supporters
-    extract_supporters_and_update_yaml(data)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Antragsgrün conventions into amendments_pipeline.dataset and .yaml")
+    parser.add_argument(
+        "--refresh", default="",
+        help="Comma-separated convention IDs whose existing pages are revalidated "
+             "with conditional requests (e.g. LDK26-1,LA26-1), or '*' for all",
+    )
+    parser.add_argument("--parser", choices=sorted(PARSERS), default=DEFAULT_PARSER,
+                        help="HTML parser backend (bs4 is the slower reference implementation)")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS,
+                        help="Processes used to parse amendment pages (1 = serial)")
+    parser.add_argument("--chunk-size", type=int, default=PARSE_CHUNK_SIZE,
+                        help="Pages handed to a parse worker at once")
+    parser.add_argument("--stream", action="store_true",
+                        help="Overlap steps 4 and 5: parse pages as they are downloaded")
+    parser.add_argument("--no-persist-html", action="store_true",
+                        help="With --stream, do not write downloaded pages to the HTML archive")
+    parser.add_argument("--no-parse-cache", action="store_true",
+                        help="Reparse every page instead of reusing results for unchanged pages")
+    parser.add_argument("--no-yaml", action="store_true",
+                        help="Only write the binary dataset file, not the amendments_pipeline.yaml export")
+    parser.add_argument("--metrics-json", default=METRICS_FILE,
+                        help="Where to write the JSON run report (stage times, latencies, failures)")
+    parser.add_argument("--prometheus",
+                        help="Also write the run metrics to this Prometheus textfile (node_exporter textfile collector)")
+    return parser.parse_args(argv)
+
+def main(args=None):
+    global EXPORT_YAML
+    args = args or parse_args()
+    EXPORT_YAML = not args.no_yaml
+    refresh_conventions = {c.strip() for c in args.refresh.split(",") if c.strip()}
+    parse_cache = None if args.no_parse_cache else ParseCache(PARSE_CACHE_DB)
+
+    try:
+        # 1. Download Starting Pages
+        with METRICS.stage("download_starting_pages"):
+            download_starting_pages(refresh_conventions)
+        
+        # 2 & 3. Extract to YAML
+        with METRICS.stage("extract_amendments"):
+            data = extract_amendments_from_starting_pages(args.parser, parse_cache)
+        
+        if args.stream:
+            # 4 & 5. Download and parse in one overlapping stage
+            with METRICS.stage("stream_amendments"):
+                stream_amendments(data, refresh_conventions, workers=args.workers, parser_name=args.parser,
+                                  persist_html=not args.no_persist_html, parse_cache=parse_cache)
+            return
+
+        # 4. Download HTMLs
+        with METRICS.stage("download_amendment_htmls"):
+            download_amendment_htmls(data, refresh_conventions)
+        
+        # 5. Extract Supporters
+        with METRICS.stage("extract_supporters"):
+            extract_supporters_and_update_yaml(data, workers=args.workers, chunk_size=args.chunk_size,
+                                               parser_name=args.parser, parse_cache=parse_cache)
+    finally:
+        if parse_cache:
+            parse_cache.close()
+        write_metrics(args)
+
+def write_metrics(args):
+    """Writes the run report and, if requested, the Prometheus textfile."""
+    try:
+        if args.metrics_json:
+            METRICS.write_json(args.metrics_json)
+        if args.prometheus:
+            METRICS.write_prometheus(args.prometheus)
+    except OSError as e:
+        print(f"Error writing metrics: {e}")
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
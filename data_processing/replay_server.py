@@ -0,0 +1,166 @@
+import os
+import sys
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+from yarl import URL
+
+from html_archive import HTML_ARCHIVE, HtmlArchive
+from html_parsers import get_parser
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTING_PAGES_DIR = os.path.join(SCRIPT_DIR, "html_starting_pages")
+
+LIVE_HOSTS = ["https://antraege.gruene.de/", "https://berlin.antragsgruen.de/"]
+
+class FaultProfile:
+    """What the replay server does to each request besides answering it."""
+
+    def __init__(self, latency=0.05, jitter=0.02, rate_429=0.0, burst_429=5, retry_after=1,
+                 rate_5xx=0.0, rate_reset=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        # Probability that a request starts a burst of burst_429 consecutive 429s
+        self.rate_429 = rate_429
+        self.burst_429 = burst_429
+        self.retry_after = retry_after
+        self.rate_5xx = rate_5xx
+        self.rate_reset = rate_reset
+        self.random = random.Random(seed)
+
+class ReplayServer:
+    """
+    Local stand-in for the Antragsgrün sites, replaying captured starting pages and
+    archived amendment pages under their original paths, with injected latency and faults.
+    Links to the live hosts inside served pages are rewritten to the replay server.
+    """
+
+    def __init__(self, starting_pages_dir=STARTING_PAGES_DIR, archive_path=HTML_ARCHIVE, faults=None):
+        self.starting_pages_dir = starting_pages_dir
+        self.archive = HtmlArchive(archive_path, readonly=True)
+        self.faults = faults or FaultProfile()
+        self.base_url = None
+        self.starting_pages = {}  # path -> convention id
+        self.amendment_pages = {}  # path -> amendment id
+        self.stats = {'requests': 0, 'served': 0, 'not_found': 0, '429': 0, '5xx': 0, 'resets': 0}
+        self._burst_left = 0
+        self._runner = None
+        self._index()
+
+    def _index(self):
+        """Maps URL paths to captured pages by parsing the captured starting pages."""
+        parser = get_parser()
+        archived = self.archive.keys()
+        for filename in sorted(os.listdir(self.starting_pages_dir)):
+            if not filename.endswith(".html"):
+                continue
+            convention_id = filename[:-len(".html")]
+            self.starting_pages[f"/{convention_id}"] = convention_id
+            with open(os.path.join(self.starting_pages_dir, filename), 'r', encoding='utf-8') as f:
+                records = parser.parse_starting_page(f.read(), convention_id, f"https://replay.invalid/{convention_id}/")
+            for aid, record in records.items():
+                if aid in archived:
+                    self.amendment_pages[URL(record['url']).path.rstrip('/')] = aid
+
+    def rewrite_url(self, url):
+        """Maps a live URL (e.g. an entry of pipeline_scraper.URLS) to the replay server."""
+        return f"{self.base_url}{URL(url).path.lstrip('/')}"
+
+    def _rewrite_links(self, body):
+        for live in LIVE_HOSTS:
+            body = body.replace(live.encode(), self.base_url.encode())
+        return body
+
+    async def handle(self, request):
+        faults = self.faults
+        self.stats['requests'] += 1
+        await asyncio.sleep(max(0.0, faults.random.gauss(faults.latency, faults.jitter)))
+
+        if self._burst_left == 0 and faults.random.random() < faults.rate_429:
+            self._burst_left = faults.burst_429
+        if self._burst_left > 0:
+            self._burst_left -= 1
+            self.stats['429'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(faults.retry_after)})
+        if faults.random.random() < faults.rate_5xx:
+            self.stats['5xx'] += 1
+            return web.Response(status=faults.random.choice([500, 502, 503]))
+        if faults.random.random() < faults.rate_reset:
+            self.stats['resets'] += 1
+            request.transport.abort()
+            return web.Response(status=500)
+
+        path = request.path.rstrip('/')
+        if path in self.starting_pages:
+            filename = os.path.join(self.starting_pages_dir, f"{self.starting_pages[path]}.html")
+            with open(filename, 'rb') as f:
+                body = f.read()
+        elif path in self.amendment_pages:
+            body = self.archive.get_bytes(self.amendment_pages[path])
+        else:
+            self.stats['not_found'] += 1
+            return web.Response(status=404)
+        self.stats['served'] += 1
+        return web.Response(body=self._rewrite_links(body), content_type='text/html', charset='utf-8')
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}/"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+        self.archive.close()
+
+def add_fault_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Std. deviation of the latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability that a request starts a 429 burst")
+    parser.add_argument("--burst-429", type=int, default=5, help="Consecutive 429s per burst")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Probability of a 500/502/503")
+    parser.add_argument("--rate-reset", type=float, default=0.0, help="Probability of a connection reset")
+    parser.add_argument("--seed", type=int, default=0)
+
+def faults_from_args(args):
+    return FaultProfile(
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429, burst_429=args.burst_429,
+        retry_after=args.retry_after, rate_5xx=args.rate_5xx, rate_reset=args.rate_reset, seed=args.seed,
+    )
+
+async def serve_forever(server, port):
+    base_url = await server.start(port=port)
+    print(f"Replaying {len(server.starting_pages)} starting pages and "
+          f"{len(server.amendment_pages)} amendment pages on {base_url}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve captured Antragsgrün pages locally with injected faults")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--starting-pages", default=STARTING_PAGES_DIR)
+    parser.add_argument("--archive", default=HTML_ARCHIVE)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = ReplayServer(args.starting_pages, args.archive, faults_from_args(args))
+    try:
+        asyncio.run(serve_forever(server, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
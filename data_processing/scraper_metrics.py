@@ -0,0 +1,143 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket containing the q-quantile (inf if beyond the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for upper, cumulative in zip(self.buckets, self.counts):
+            if cumulative >= rank:
+                return upper
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {str(upper): c for upper, c in zip(self.buckets, self.counts)},
+        }
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _label_str(key):
+    return ",".join(f'{k}="{v}"' for k, v in key)
+
+def _series(name, labels):
+    return f"{name}{{{labels}}}" if labels else name
+
+class Metrics:
+    """
+    Run metrics of the scraper: labelled counters, latency histograms and stage wall times.
+    Written as a JSON run report and optionally as a Prometheus textfile.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}  # name -> {label key: value}
+        self.histograms = {}  # name -> {label key: Histogram}
+        self.stages = {}  # stage name -> seconds
+
+    def inc(self, name, value=1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(value)
+
+    @contextmanager
+    def stage(self, name):
+        """Times a pipeline stage."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes the duration of the block in histogram `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def to_dict(self):
+        return {
+            'started': self.started,
+            'duration_s': round(time.time() - self.started, 3),
+            'stages_s': {name: round(s, 3) for name, s in self.stages.items()},
+            'counters': {
+                name: [{'labels': dict(key), 'value': v} for key, v in series.items()]
+                for name, series in self.counters.items()
+            },
+            'histograms': {
+                name: [{'labels': dict(key), **h.to_dict()} for key, h in series.items()]
+                for name, series in self.histograms.items()
+            },
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def write_prometheus(self, path, prefix="scraper_"):
+        """Writes a node_exporter textfile; written to a temp file and renamed so scrapes never see half a file."""
+        lines = []
+        if self.stages:
+            lines.append(f"# TYPE {prefix}stage_seconds gauge")
+        for name, seconds in self.stages.items():
+            lines.append(f'{prefix}stage_seconds{{stage="{name}"}} {seconds:.6f}')
+        for name, series in self.counters.items():
+            lines.append(f"# TYPE {prefix}{name} counter")
+            for key, value in series.items():
+                lines.append(f"{_series(prefix + name, _label_str(key))} {value}")
+        for name, series in self.histograms.items():
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            for key, h in series.items():
+                labels = _label_str(key)
+                sep = "," if labels else ""
+                for upper, cumulative in zip(h.buckets, h.counts):
+                    lines.append(f'{prefix}{name}_bucket{{{labels}{sep}le="{upper}"}} {cumulative}')
+                lines.append(f'{prefix}{name}_bucket{{{labels}{sep}le="+Inf"}} {h.count}')
+                lines.append(f"{_series(prefix + name + '_sum', labels)} {h.sum:.6f}")
+                lines.append(f"{_series(prefix + name + '_count', labels)} {h.count}")
+        temp_file = path + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_file, path)
+
+# Process-wide metrics of the current run
+METRICS = Metrics()
@@ -0,0 +1,114 @@
+import os
+import datetime
+
+import pytest
+
+import amendments_dataset
+import pipeline_scraper
+from amendments_dataset import Dataset, load_records, write_dataset, write_yaml
+
+RECORDS = {
+    '51bdk/A-01': {
+        'convention': '51bdk', 'url': 'https://antraege.gruene.de/51bdk/motion/1', 'label': 'A-01: Klima',
+        'author': 'Bundesvorstand', 'isprs': False, 'type': 'motion',
+    },
+    '51bdk/A-01-012': {
+        'convention': '51bdk', 'url': 'https://antraege.gruene.de/51bdk/motion/1/amendment/12',
+        'label': 'A-01-012', 'author': 'Jörg Schmidt (KV Köln)', 'isprs': True, 'type': 'amendment',
+        'applicant_details': {'id': 'jrg-schmidt', 'name': 'Jörg Schmidt', 'kv': 'KV Köln'},
+        'supporters': [{'id': 'eva-co', 'name': 'Eva & Co', 'kv': 'KV Berlin-Mitte'}],
+    },
+}
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "amendments.dataset"), str(tmp_path / "amendments.yaml")
+
+def _no_import(*args, **kwargs):
+    raise AssertionError("load_records re-imported the YAML")
+
+def test_round_trip(paths):
+    path, _ = paths
+    write_dataset(RECORDS, path)
+    with Dataset(path) as dataset:
+        assert dataset.records() == RECORDS
+
+def test_snapshot_then_load_takes_fast_path(paths, monkeypatch):
+    path, yaml_path = paths
+    monkeypatch.setattr(pipeline_scraper, "DATASET_FILE", path)
+    monkeypatch.setattr(pipeline_scraper, "YAML_FILE", yaml_path)
+    monkeypatch.setattr(pipeline_scraper, "EXPORT_YAML", True)
+    assert pipeline_scraper.save_snapshot(RECORDS)
+    monkeypatch.setattr(amendments_dataset, "read_yaml", _no_import)
+    monkeypatch.setattr(amendments_dataset, "write_dataset", _no_import)
+    assert load_records(None, path, yaml_path) == RECORDS
+
+def test_unchanged_yaml_with_newer_mtime_is_not_imported(paths, monkeypatch):
+    path, yaml_path = paths
+    write_yaml(RECORDS, yaml_path)
+    write_dataset(RECORDS, path, yaml_path)
+    # Only the stamp counts, so the dataset is still current when the YAML is newer on disk
+    newer = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(yaml_path, ns=(newer, newer))
+    write_dataset(RECORDS, path, yaml_path)
+    monkeypatch.setattr(amendments_dataset, "read_yaml", _no_import)
+    assert load_records(None, path, yaml_path) == RECORDS
+
+def test_edited_yaml_is_imported(paths):
+    path, yaml_path = paths
+    write_yaml(RECORDS, yaml_path)
+    write_dataset(RECORDS, path, yaml_path)
+    edited = {aid: dict(record) for aid, record in RECORDS.items()}
+    edited['51bdk/A-01']['label'] = 'A-01: Klima (bearbeitet)'
+    write_yaml(edited, yaml_path)
+    assert load_records(None, path, yaml_path) == edited
+    # The import stamps the edited YAML, so the next load is fast again
+    with Dataset(path) as dataset:
+        assert dataset.header['yaml'] == amendments_dataset._yaml_stamp(yaml_path)
+
+def test_yaml_only_is_imported_and_missing_is_none(paths):
+    path, yaml_path = paths
+    assert load_records(None, path, yaml_path) is None
+    write_yaml(RECORDS, yaml_path)
+    assert load_records(['label'], path, yaml_path) == {aid: {'label': r['label']} for aid, r in RECORDS.items()}
+    assert os.path.exists(path)
+
+def test_pool_of_only_empty_strings(paths):
+    path, _ = paths
+    data = {
+        'a': {'convention': '51bdk', 'author': '', 'applicant_details': {'id': 'x', 'name': 'X', 'kv': ''}},
+        'b': {'convention': '51bdk', 'author': '', 'supporters': [{'id': 'y', 'name': 'Y', 'kv': ''}]},
+    }
+    write_dataset(data, path)
+    with Dataset(path) as dataset:
+        assert dataset.pool('author') == ['']
+        assert dataset.pool('kv') == ['']
+        assert dataset.pool('label') == []
+        assert dataset.records() == data
+
+def test_yaml_types_outside_json_round_trip(paths):
+    path, yaml_path = paths
+    data = {
+        'a': {
+            'label': 'A-01',
+            'submitted': datetime.date(2024, 11, 15),
+            'scraped': datetime.datetime(2024, 11, 16, 8, 30, tzinfo=datetime.timezone.utc),
+            'tags': {'klima', 'energie'},
+            'raw': b'\x00\xff',
+            'by_year': {2023: 'alt', 2024: 'neu'},
+            'note': {'__yaml__': 'a key that looks like the tag'},
+            'isprs': 'yes',
+        },
+    }
+    write_dataset(data, path)
+    with Dataset(path) as dataset:
+        assert dataset.records() == data
+    # Through the YAML import as well, with the types as the YAML loader produces them
+    write_yaml({'b': {k: v for k, v in data['a'].items() if k != 'tags'}}, yaml_path)
+    assert load_records(None, path + "2", yaml_path) == amendments_dataset.read_yaml(yaml_path)
+
+def test_unsupported_extra_type_raises(paths):
+    path, _ = paths
+    with pytest.raises(TypeError):
+        write_dataset({'a': {'label': 'A-01', 'span': (1, 2)}}, path)
+    assert not os.path.exists(path)
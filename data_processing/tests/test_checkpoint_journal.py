@@ -0,0 +1,29 @@
+import pipeline_scraper
+from checkpoint_journal import CheckpointJournal
+
+APPLICANT = {'id': 'jrg-schmidt', 'name': 'Jörg Schmidt', 'kv': 'KV Köln'}
+SUPPORTERS = [{'id': 'eva-co', 'name': 'Eva & Co', 'kv': 'KV Berlin-Mitte'}]
+
+def test_replay_returns_page_hashes(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.append('a', 'hash-a', APPLICANT, SUPPORTERS)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"aid": "b", "applicant_det')
+    assert CheckpointJournal(path).replay() == {'a': ('hash-a', APPLICANT, SUPPORTERS)}
+
+def test_resume_skips_entries_of_changed_pages(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.append('same', 'h1', APPLICANT, SUPPORTERS)
+        journal.append('refreshed', 'h2', APPLICANT, SUPPORTERS)
+    with open(path, 'a', encoding='utf-8') as f:
+        # Written before entries carried a page hash
+        f.write('{"aid": "old", "applicant_details": {}, "supporters": []}\n')
+    data = {aid: {'isprs': True} for aid in ('same', 'refreshed', 'old')}
+    done = pipeline_scraper.resume_from_journal(
+        data, CheckpointJournal(path), {'same': 'h1', 'refreshed': 'h2-new', 'old': 'h3'},
+    )
+    assert done == {'same'}
+    assert data['same']['supporters'] == SUPPORTERS
+    assert 'supporters' not in data['refreshed'] and 'supporters' not in data['old']
@@ -0,0 +1,13 @@
+import numpy as np
+
+from forceatlas2 import forceatlas2
+
+def test_strong_gravity_ignores_scaling_ratio():
+    # A single node feels no repulsion or attraction, only gravity
+    layouts = [
+        forceatlas2(1, [], [], positions=[(10.0, -5.0)], iterations=3, scaling_ratio=ratio, strong_gravity=True)
+        for ratio in (1.0, 2.0, 20.0)
+    ]
+    for layout in layouts[1:]:
+        assert np.allclose(layout, layouts[0])
+    assert np.hypot(*layouts[0][0]) < np.hypot(10.0, -5.0)
@@ -0,0 +1,65 @@
+import struct
+
+import numpy as np
+import pytest
+
+from graph_bundle import FORMAT_VERSION, MAGIC, GraphBundle, write_bundle
+
+# render_node tuples: id, label, type, convention, kv, url, weight
+NODES = [
+    ('p-jrg-schmidt', 'Jörg Schmidt', 'person', None, 'KV Köln', None, 3),
+    ('51bdk-a-01', 'A-01: Klimaschutz für alle – jetzt', 'amendment', '51bdk', None,
+     'https://antraege.gruene.de/51bdk/motion/1', 0),
+    ('p-ana-garcia', 'Ana García 🌻', 'person', None, None, None, 1),
+    ('51bdk-a-01-012', '', 'amendment', '51bdk', 'KV Berlin-Mitte', None, 2),
+]
+SOURCES = [0, 2, 0]
+TARGETS = [1, 1, 3]
+WEIGHTS = [1.0, 0.1, 2.5]
+VIZ = [(12.345, -6.789, 2.0), (0.0, 0.0, 8.0), (-1e3, 1e-3, 3.1416), (100.5, 200.25, 5.5)]
+CLUSTERS = [0, 0, 1, 1]
+
+def _edges():
+    ids = [node[0] for node in NODES]
+    return [ids[i] for i in SOURCES], [ids[i] for i in TARGETS]
+
+@pytest.mark.parametrize('viz, clusters', [(None, None), (VIZ, CLUSTERS), (VIZ, None), (None, CLUSTERS)])
+def test_round_trip(tmp_path, viz, clusters):
+    path = str(tmp_path / "graph.bin")
+    write_bundle(path, NODES, SOURCES, TARGETS, WEIGHTS, viz, clusters)
+    bundle = GraphBundle(path)
+    assert len(bundle) == len(NODES)
+    assert bundle.nodes() == NODES
+    sources, targets, weights = bundle.edges()
+    assert (sources, targets) == _edges()
+    assert np.allclose(weights, WEIGHTS, rtol=1e-6, atol=0)
+    assert bundle.clusters() == clusters
+    if viz is None:
+        assert bundle.viz() is None
+    else:
+        assert np.allclose(bundle.viz(), viz, rtol=1e-6, atol=0)
+        assert np.array_equal(bundle.viz(), np.array(viz, dtype=np.float32))
+
+def test_empty_graph(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    write_bundle(path, [], [], [], [])
+    bundle = GraphBundle(path)
+    assert bundle.nodes() == []
+    assert bundle.edges() == ([], [], [])
+
+def test_rejects_bad_magic(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    write_bundle(path, NODES, SOURCES, TARGETS, WEIGHTS)
+    with open(path, 'r+b') as f:
+        f.write(b"GEXF")
+    with pytest.raises(ValueError, match="not a graph bundle"):
+        GraphBundle(path)
+
+def test_rejects_other_version(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    write_bundle(path, NODES, SOURCES, TARGETS, WEIGHTS)
+    with open(path, 'r+b') as f:
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<H", FORMAT_VERSION + 1))
+    with pytest.raises(ValueError, match="format version"):
+        GraphBundle(path)
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from html_parsers import Bs4Parser, LxmlParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+def fixture_names(prefix):
+    return sorted(f for f in os.listdir(FIXTURES) if f.startswith(prefix) and f.endswith(".html"))
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize("name", fixture_names("starting_page"))
+def test_starting_page_backends_agree(name):
+    html = read_fixture(name)
+    expected = Bs4Parser().parse_starting_page(html, "51bdk", "https://antraege.gruene.de/51bdk/")
+    assert expected
+    assert LxmlParser().parse_starting_page(html, "51bdk", "https://antraege.gruene.de/51bdk/") == expected
+
+@pytest.mark.parametrize("name", fixture_names("amendment"))
+def test_amendment_page_backends_agree(name):
+    html = read_fixture(name)
+    expected = Bs4Parser().parse_amendment_page(html, "Fallback Person")
+    assert LxmlParser().parse_amendment_page(html, "Fallback Person") == expected
+
+@pytest.mark.parametrize("html", ["", "   ", "<html><body></body></html>"])
+def test_empty_pages_backends_agree(html):
+    expected = Bs4Parser().parse_starting_page(html, "51bdk", "https://antraege.gruene.de/51bdk/")
+    assert expected == {}
+    assert LxmlParser().parse_starting_page(html, "51bdk", "https://antraege.gruene.de/51bdk/") == expected
+    assert LxmlParser().parse_amendment_page(html, "X") == Bs4Parser().parse_amendment_page(html, "X")
+
+def test_fixtures_cover_edge_cases():
+    records = LxmlParser().parse_starting_page(
+        read_fixture("starting_page.html"), "51bdk", "https://antraege.gruene.de/51bdk/")
+    assert records["51bdk/A-01"]['label'] == "A-01: Klima & Energie für\xa0alle"
+    assert records["51bdk/A-01"]['isprs'] is False
+    assert records["51bdk/A-01-034"]['author'] == "Eva & Co(KV Berlin-Mitte)"
+
+    applicant, supporters = LxmlParser().parse_amendment_page(read_fixture("amendment_full_list.html"))
+    assert applicant['name'] == "Jörg Schmidt"
+    assert [s['name'] for s in supporters][:2] == ["Eva & Co", "Tom O'Neil"]
+
+    applicant, supporters = LxmlParser().parse_amendment_page(read_fixture("amendment_no_supporters.html"), "Fallback")
+    assert applicant['name'] == "Fallback" and supporters == []
@@ -0,0 +1,32 @@
+import sqlite3
+
+import pytest
+
+import parse_cache
+from parse_cache import ParseCache, cache_key
+
+def _stored(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_puts_are_committed_before_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, "COMMIT_EVERY", 3)
+    path = str(tmp_path / "parse_cache.sqlite")
+    cache = ParseCache(path)
+    for i in range(7):
+        cache.put(cache_key(f"page{i}"), [{'id': 'x'}, []])
+    assert _stored(path) == 6
+    cache.close()
+    assert _stored(path) == 7
+
+def test_exit_commits_when_run_fails(tmp_path):
+    path = str(tmp_path / "parse_cache.sqlite")
+    with pytest.raises(RuntimeError):
+        with ParseCache(path) as cache:
+            cache.put(cache_key("page"), [{'id': 'x'}, []])
+            raise RuntimeError("interrupted")
+    with ParseCache(path) as cache:
+        assert cache.get(cache_key("page")) == [{'id': 'x'}, []]
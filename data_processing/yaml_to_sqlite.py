@@ -1,14 +1,22 @@
 import os
-import sys
+import argparse
 import re
 import json
+import math
 import sqlite3
-import yaml
+import hashlib
+import itertools
+
+import numpy as np
+
+from amendments_dataset import DATASET_FILE, YAML_FILE, load_records, read_yaml
+from bipartite_graph import AUTHORED, SUPPORTS, BipartiteGraph, Interner
+from conventions import get_conv_year
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DEFAULT_YAML = os.path.join(SCRIPT_DIR, "amendments_pipeline.yaml")
 AMENDMENTS_DB = os.path.join(SCRIPT_DIR, "amendments.sqlite")
 prsS_DB = os.path.join(SCRIPT_DIR, "prss.sqlite")
+MERGED_DB = os.path.join(SCRIPT_DIR, "amendments_merged.sqlite")
 
 RE_ID_CLEAN = re.compile(r'[^a-z0-9-]')
 
@@ -18,45 +26,296 @@ def slugify(text):
     text = text.lower().replace(' ', '-')
     return RE_ID_CLEAN.sub('', text)
 
-def load_yaml(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+def load_data(path=None):
+    """Loads the fields needed here from the dataset file, or from an explicitly given YAML or dataset file."""
+    fields = ['convention', 'url', 'label', 'author', 'isprs', 'type', 'applicant_details', 'supporters']
+    if not path:
+        return load_records(fields)
+    if path.endswith((".yaml", ".yml")):
+        return read_yaml(path)
+    return load_records(fields, path=path, yaml_path=None)
 
-def ensure_amendments_schema(conn):
-    cur = conn.cursor()
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS amendments ("
+# Stored as PRAGMA user_version; --incremental only updates databases with the current schema
+SCHEMA_VERSION = 2
+# Rows per executemany call
+BATCH_SIZE = 5000
+# Build-time settings: the file is private until it is swapped in, so durability is only needed at the end
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-262144",  # 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
+
+TABLES = {
+    'conventions': (
+        "CREATE TABLE IF NOT EXISTS conventions ("
+        "id TEXT PRIMARY KEY,"
+        "year REAL,"
+        "amendment_count INTEGER,"
+        "person_count INTEGER)"
+    ),
+    'amendment': (
+        "CREATE TABLE IF NOT EXISTS amendment ("
         "id TEXT PRIMARY KEY,"
         "convention TEXT,"
         "url TEXT,"
         "label TEXT,"
-        "applicant_id TEXT,"
-        "supporter_ids TEXT)"
-    )
-    conn.commit()
-
-def ensure_prss_schema(conn):
-    cur = conn.cursor()
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS prss ("
+        "applicant_id TEXT)"
+    ),
+    'person': (
+        "CREATE TABLE IF NOT EXISTS person ("
         "id TEXT PRIMARY KEY,"
         "name TEXT,"
-        "kv TEXT,"
-        "applicated_ids TEXT,"
-        "applicated_count INTEGER,"
-        "supported_ids TEXT,"
-        "supported_count INTEGER,"
-        "conventions TEXT)"
-    )
+        "kv TEXT)"
+    ),
+    # One row per (amendment, person, role); position keeps the supporters' order on the page
+    'amendment_support': (
+        "CREATE TABLE IF NOT EXISTS amendment_support ("
+        "amendment_id TEXT NOT NULL,"
+        "person_id TEXT NOT NULL,"
+        "role TEXT NOT NULL,"
+        "convention TEXT,"
+        "position INTEGER,"
+        "PRIMARY KEY (amendment_id, role, person_id)) WITHOUT ROWID"
+    ),
+    # Hash of everything an amendment contributes to the other tables, for --incremental
+    'record_hashes': (
+        "CREATE TABLE IF NOT EXISTS record_hashes ("
+        "amendment_id TEXT PRIMARY KEY,"
+        "record_hash TEXT NOT NULL) WITHOUT ROWID"
+    ),
+}
+
+# Created after the load. amendment_support's primary key covers amendment -> persons,
+# idx_support_person covers person -> amendments
+INDEXES = {
+    'amendment': (
+        "CREATE INDEX IF NOT EXISTS idx_amendment_convention ON amendment(convention)",
+        "CREATE INDEX IF NOT EXISTS idx_amendment_applicant ON amendment(applicant_id)",
+    ),
+    'amendment_support': (
+        "CREATE INDEX IF NOT EXISTS idx_support_person "
+        "ON amendment_support(person_id, role, amendment_id, convention)",
+    ),
+}
+
+# The pre-normalization tables, with their ID lists as JSON text, for existing readers
+VIEWS = {
+    'amendments': (
+        "CREATE VIEW IF NOT EXISTS amendments AS "
+        "SELECT a.id, a.convention, a.url, a.label, a.applicant_id, "
+        "(SELECT json_group_array(person_id) FROM ("
+        "  SELECT person_id FROM amendment_support s"
+        "  WHERE s.amendment_id = a.id AND s.role = 'supporter' ORDER BY s.position)) AS supporter_ids "
+        "FROM amendment a"
+    ),
+    'prss': (
+        "CREATE VIEW IF NOT EXISTS prss AS "
+        "SELECT p.id, p.name, p.kv, "
+        "(SELECT json_group_array(amendment_id) FROM ("
+        "  SELECT amendment_id FROM amendment_support s"
+        "  WHERE s.person_id = p.id AND s.role = 'applicant' ORDER BY amendment_id)) AS applicated_ids, "
+        "(SELECT COUNT(*) FROM amendment_support s"
+        "  WHERE s.person_id = p.id AND s.role = 'applicant') AS applicated_count, "
+        "(SELECT json_group_array(amendment_id) FROM ("
+        "  SELECT amendment_id FROM amendment_support s"
+        "  WHERE s.person_id = p.id AND s.role = 'supporter' ORDER BY amendment_id)) AS supported_ids, "
+        "(SELECT COUNT(*) FROM amendment_support s"
+        "  WHERE s.person_id = p.id AND s.role = 'supporter') AS supported_count, "
+        "(SELECT json_group_array(convention) FROM ("
+        "  SELECT DISTINCT convention FROM amendment_support s"
+        "  WHERE s.person_id = p.id AND s.convention != '' ORDER BY convention)) AS conventions "
+        "FROM person p"
+    ),
+}
+
+# (tables, views) of each database file
+AMENDMENTS_DB_OBJECTS = (('conventions', 'amendment', 'person', 'amendment_support', 'record_hashes'), ('amendments',))
+PRSS_DB_OBJECTS = (('conventions', 'person', 'amendment_support', 'record_hashes'), ('prss',))
+
+# Full-text indexes of the merged database. The trigram tokenizer matches any substring of
+# three or more characters, which also finds parts of German compounds ("klima" in "Klimaschutzgesetz")
+SEARCH_INDEXES = (
+    "CREATE VIRTUAL TABLE amendment_fts USING fts5("
+    "label, content='amendment', content_rowid='rowid', tokenize='trigram')",
+    "INSERT INTO amendment_fts(amendment_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE person_fts USING fts5("
+    "name, kv, content='person', content_rowid='rowid', tokenize='trigram')",
+    "INSERT INTO person_fts(person_fts) VALUES ('rebuild')",
+    # Keep the external-content indexes in sync with --incremental updates
+    "CREATE TRIGGER amendment_fts_insert AFTER INSERT ON amendment BEGIN "
+    "INSERT INTO amendment_fts(rowid, label) VALUES (new.rowid, new.label); END",
+    "CREATE TRIGGER amendment_fts_delete AFTER DELETE ON amendment BEGIN "
+    "INSERT INTO amendment_fts(amendment_fts, rowid, label) VALUES ('delete', old.rowid, old.label); END",
+    "CREATE TRIGGER person_fts_insert AFTER INSERT ON person BEGIN "
+    "INSERT INTO person_fts(rowid, name, kv) VALUES (new.rowid, new.name, new.kv); END",
+    "CREATE TRIGGER person_fts_delete AFTER DELETE ON person BEGIN "
+    "INSERT INTO person_fts(person_fts, rowid, name, kv) VALUES ('delete', old.rowid, old.name, old.kv); END",
+    "CREATE TRIGGER person_fts_update AFTER UPDATE ON person BEGIN "
+    "INSERT INTO person_fts(person_fts, rowid, name, kv) VALUES ('delete', old.rowid, old.name, old.kv); "
+    "INSERT INTO person_fts(rowid, name, kv) VALUES (new.rowid, new.name, new.kv); END",
+)
+# Shorter queries cannot use trigrams and fall back to a LIKE scan
+MIN_FTS_QUERY = 3
+
+INSERTS = {
+    'conventions': "INSERT INTO conventions (id, year, amendment_count, person_count) VALUES (?, ?, ?, ?)",
+    'amendment': "INSERT INTO amendment (id, convention, url, label, applicant_id) VALUES (?, ?, ?, ?, ?)",
+    'person': "INSERT INTO person (id, name, kv) VALUES (?, ?, ?)",
+    'amendment_support': (
+        "INSERT OR IGNORE INTO amendment_support (amendment_id, person_id, role, convention, position) "
+        "VALUES (?, ?, ?, ?, ?)"
+    ),
+    'record_hashes': "INSERT INTO record_hashes (amendment_id, record_hash) VALUES (?, ?)",
+}
+
+# Optional materialized statistics (--aggregates), computed from amendment_support in SQL.
+# Weights follow generate_conventions_gexf.py: cube root of (supported + 5 * authored) per convention
+AGGREGATE_TABLES = {
+    'build_info': "CREATE TABLE IF NOT EXISTS build_info (key TEXT PRIMARY KEY, value)",
+    'person_convention_stats': (
+        "CREATE TABLE IF NOT EXISTS person_convention_stats ("
+        "person_id TEXT NOT NULL,"
+        "convention TEXT NOT NULL,"
+        "supports INTEGER,"
+        "authored INTEGER,"
+        "weight REAL,"
+        "PRIMARY KEY (person_id, convention)) WITHOUT ROWID"
+    ),
+    'person_activity': (
+        "CREATE TABLE IF NOT EXISTS person_activity ("
+        "person_id TEXT PRIMARY KEY,"
+        "total_weight REAL,"
+        "weighted_year REAL,"
+        "degree INTEGER)"
+    ),
+    # Pairs of persons on at least build_info.min_co_support common amendments, person_a < person_b
+    'co_support': (
+        "CREATE TABLE IF NOT EXISTS co_support ("
+        "person_a TEXT NOT NULL,"
+        "person_b TEXT NOT NULL,"
+        "count INTEGER,"
+        "PRIMARY KEY (person_a, person_b)) WITHOUT ROWID"
+    ),
+}
+AGGREGATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_co_support_b ON co_support(person_b, person_a, count)",
+)
+MIN_CO_SUPPORT = 2
+
+# The {persons} filter is empty for a full computation, or restricts to temp.affected_person
+AGGREGATE_SQL = (
+    "INSERT INTO person_convention_stats (person_id, convention, supports, authored, weight) "
+    "SELECT person_id, convention, supports, authored, pow(supports + 5 * authored, 1.0 / 3) FROM ("
+    "  SELECT person_id, convention, SUM(role = 'supporter') AS supports, SUM(role = 'applicant') AS authored"
+    "  FROM amendment_support WHERE convention != '' {persons} GROUP BY person_id, convention)",
+    "INSERT INTO person_activity (person_id, total_weight, weighted_year, degree) "
+    "SELECT s.person_id, SUM(s.weight), SUM(s.weight * c.year) / SUM(s.weight), "
+    "  (SELECT COUNT(*) FROM amendment_support x WHERE x.person_id = s.person_id) "
+    "FROM person_convention_stats s JOIN conventions c ON c.id = s.convention "
+    "WHERE 1 {stats_persons} GROUP BY s.person_id",
+)
+CO_SUPPORT_SQL = (
+    "INSERT INTO co_support (person_a, person_b, count) "
+    "SELECT a.person_id, b.person_id, COUNT(*) FROM amendment_support a "
+    "JOIN amendment_support b ON b.amendment_id = a.amendment_id AND b.person_id > a.person_id "
+    "GROUP BY a.person_id, b.person_id HAVING COUNT(*) >= ?"
+)
+# Pairs with at least one affected person, driven from the affected persons' rows
+CO_SUPPORT_AFFECTED_SQL = (
+    "INSERT INTO co_support (person_a, person_b, count) "
+    "SELECT MIN(a.person_id, b.person_id) AS p, MAX(a.person_id, b.person_id) AS q, "
+    "  COUNT(DISTINCT a.amendment_id) FROM temp.affected_person x "
+    "JOIN amendment_support a ON a.person_id = x.id "
+    "JOIN amendment_support b ON b.amendment_id = a.amendment_id AND b.person_id != a.person_id "
+    "GROUP BY p, q HAVING COUNT(DISTINCT a.amendment_id) >= ?"
+)
+
+# Tables whose rows belong to one amendment, with the column naming it
+AMENDMENT_KEYS = {'amendment': 'id', 'amendment_support': 'amendment_id', 'record_hashes': 'amendment_id'}
+
+def remove_db_files(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def open_build_db(path):
+    """Opens a fresh scratch database next to `path` with bulk-load PRAGMAs. Returns (conn, scratch path)."""
+    build_path = path + ".build"
+    remove_db_files(build_path)
+    conn = sqlite3.connect(build_path)
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    return conn, build_path
+
+def swap_in_db(conn, build_path, path):
+    """
+    Makes the scratch database self-contained and durable, then atomically replaces `path` with it,
+    so readers see either the old or the complete new database.
+    """
     conn.commit()
+    # Leaving WAL mode checkpoints the log into the main file
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+    with open(build_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(build_path, path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def insert_batches(conn, sql, rows):
+    """executemany over batches of BATCH_SIZE rows from an iterable, inside the connection's open transaction."""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        conn.executemany(sql, batch)
+
+def record_hash(*parts):
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class SupportRows:
+    """
+    amendment_support rows generated from the graph's edges on each iteration, rather than
+    held as one tuple per edge: each applicant first, then the supporters in order.
+    """
+
+    __slots__ = ('graph',)
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return self.graph.edge_count
 
-def build_databases(data):
-    amend_conn = sqlite3.connect(AMENDMENTS_DB)
-    prss_conn = sqlite3.connect(prsS_DB)
-    ensure_amendments_schema(amend_conn)
-    ensure_prss_schema(prss_conn)
+    def __iter__(self):
+        graph = self.graph
+        person_ids = graph.persons.ids
+        edge_person = graph.edge_person
+        edge_role = graph.edge_role
+        adjacency = graph.amendment_adjacency()
+        for a, aid in enumerate(graph.amendments.ids):
+            convention = graph.amendment_convention[a]
+            position = 0
+            for e in adjacency[a].tolist():
+                if edge_role[e] == AUTHORED:
+                    yield (aid, person_ids[edge_person[e]], 'applicant', convention, 0)
+                else:
+                    yield (aid, person_ids[edge_person[e]], 'supporter', convention, position)
+                    position += 1
 
-    prss = {}
+def normalized_rows(data):
+    """
+    Splits the dataset into rows for the normalized tables.
+    Returns {table: rows}; amendment_support is a SupportRows, the others are lists.
+    """
+    amendments = []
+    hashes = []
+    # Persons and support edges; the first non-empty name/kv seen for a person wins
+    graph = BipartiteGraph()
 
     for aid, info in data.items():
         if info.get('type') != 'amendment':
@@ -81,92 +340,309 @@ def build_databases(data):
         if not applicant_id or len(supporter_ids) < 1:
             continue
 
-        cur = amend_conn.cursor()
-        cur.execute(
-            "INSERT OR REPLACE INTO amendments "
-            "(id, convention, url, label, applicant_id, supporter_ids) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (
-                aid,
-                info.get('convention', ''),
-                info.get('url', ''),
-                info.get('label', ''),
-                applicant_id,
-                json.dumps(supporter_ids, ensure_ascii=False),
-            ),
-        )
-        amend_conn.commit()
-
-        if applicant_id not in prss:
-            prss[applicant_id] = {
-                'id': applicant_id,
-                'name': applicant_name,
-                'kv': applicant_kv,
-                'applicated_ids': set(),
-                'supported_ids': set(),
-                'conventions': set(),
-            }
-        p = prss[applicant_id]
-        if not p['name'] and applicant_name:
-            p['name'] = applicant_name
-        if not p['kv'] and applicant_kv:
-            p['kv'] = applicant_kv
-        p['applicated_ids'].add(aid)
-        p['conventions'].add(info.get('convention', ''))
+        convention = info.get('convention', '')
+        amendment = (aid, convention, info.get('url', ''), info.get('label', ''), applicant_id)
+        amendments.append(amendment)
+        a = graph.add_amendment(aid, convention=convention)
+        graph.add_edge(graph.add_person(applicant_id, applicant_name or "", applicant_kv, fill=True), a, AUTHORED)
+        record_support = [(aid, applicant_id, 'applicant', convention, 0)]
+        record_persons = [(applicant_id, applicant_name, applicant_kv)]
 
         sup_index = { (s or {}).get('id') or slugify((s or {}).get('name','')): s for s in supporters }
-        for sid in supporter_ids:
+        for position, sid in enumerate(supporter_ids):
             srec = sup_index.get(sid) or {}
-            sname = srec.get('name') or ""
-            skv = srec.get('kv') or ""
-            if sid not in prss:
-                prss[sid] = {
-                    'id': sid,
-                    'name': sname,
-                    'kv': skv,
-                    'applicated_ids': set(),
-                    'supported_ids': set(),
-                    'conventions': set(),
-                }
-            sp = prss[sid]
-            if not sp['name'] and sname:
-                sp['name'] = sname
-            if not sp['kv'] and skv:
-                sp['kv'] = skv
-            sp['supported_ids'].add(aid)
-            sp['conventions'].add(info.get('convention', ''))
-
-    pcur = prss_conn.cursor()
-    for pid, p in prss.items():
-        applicated_ids = sorted(list(p['applicated_ids']))
-        supported_ids = sorted(list(p['supported_ids']))
-        conventions = sorted([c for c in p['conventions'] if c])
-        pcur.execute(
-            "INSERT OR REPLACE INTO prss "
-            "(id, name, kv, applicated_ids, applicated_count, supported_ids, supported_count, conventions) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                pid,
-                p['name'],
-                p['kv'],
-                json.dumps(applicated_ids, ensure_ascii=False),
-                len(applicated_ids),
-                json.dumps(supported_ids, ensure_ascii=False),
-                len(supported_ids),
-                json.dumps(conventions, ensure_ascii=False),
-            ),
-        )
-    prss_conn.commit()
-
-    amend_conn.close()
-    prss_conn.close()
+            name = srec.get('name') or ""
+            kv = srec.get('kv') or ""
+            graph.add_edge(graph.add_person(sid, name, kv, fill=True), a, SUPPORTS)
+            record_support.append((aid, sid, 'supporter', convention, position))
+            record_persons.append((sid, name, kv))
+        hashes.append((aid, record_hash(amendment, record_support, record_persons)))
+
+    # Distinct amendments and persons per convention
+    edge_person, edge_amendment, _ = graph.edges()
+    person_ids = graph.persons.ids
+    convention_ids = Interner()
+    amendment_conv = np.array([convention_ids.add(c) for c in graph.amendment_convention], dtype=np.int64)
+    n_conventions = len(convention_ids)
+    stride = max(1, len(person_ids))
+    amendment_counts = np.bincount(amendment_conv[np.unique(edge_amendment)], minlength=n_conventions).tolist()
+    pairs = np.unique(amendment_conv[edge_amendment] * stride + edge_person)
+    person_counts = np.bincount(pairs // stride, minlength=n_conventions).tolist()
+    conventions = [
+        (cid, get_conv_year(cid), amendment_counts[c], person_counts[c])
+        for cid, c in sorted((cid, c) for cid, c in convention_ids.index.items() if cid)
+    ]
+
+    return {
+        'conventions': conventions,
+        'amendment': amendments,
+        'person': list(zip(person_ids, graph.person_label, graph.person_kv)),
+        'amendment_support': SupportRows(graph),
+        'record_hashes': hashes,
+    }
+
+def load_database(conn, tables, views, rows):
+    """Creates and fills the given tables in one transaction, then their indexes and the views."""
+    for table in tables:
+        conn.execute(TABLES[table])
+    for table in tables:
+        insert_batches(conn, INSERTS[table], rows[table])
+    for table in tables:
+        for statement in INDEXES.get(table, ()):
+            conn.execute(statement)
+    for view in views:
+        conn.execute(VIEWS[view])
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+def register_functions(conn):
+    conn.create_function("pow", 2, math.pow, deterministic=True)
+
+def has_table(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+def materialize_aggregates(conn, min_co_support=MIN_CO_SUPPORT):
+    """Creates and fills the aggregate tables from amendment_support and conventions."""
+    register_functions(conn)
+    for statement in AGGREGATE_TABLES.values():
+        conn.execute(statement)
+    conn.execute("INSERT OR REPLACE INTO build_info (key, value) VALUES ('min_co_support', ?)", (min_co_support,))
+    for statement in AGGREGATE_SQL:
+        conn.execute(statement.format(persons="", stats_persons=""))
+    conn.execute(CO_SUPPORT_SQL, (min_co_support,))
+    for statement in AGGREGATE_INDEXES:
+        conn.execute(statement)
+    conn.commit()
+
+def refresh_aggregates(conn, persons):
+    """Recomputes the aggregate rows of the given persons (and their co-support pairs), inside the open transaction."""
+    register_functions(conn)
+    min_co_support = conn.execute("SELECT value FROM build_info WHERE key = 'min_co_support'").fetchone()[0]
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS affected_person (id TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.affected_person")
+    conn.executemany("INSERT INTO temp.affected_person (id) VALUES (?)", [(pid,) for pid in persons])
+    affected = "IN (SELECT id FROM temp.affected_person)"
+    conn.execute(f"DELETE FROM person_convention_stats WHERE person_id {affected}")
+    conn.execute(f"DELETE FROM person_activity WHERE person_id {affected}")
+    conn.execute(f"DELETE FROM co_support WHERE person_a {affected} OR person_b {affected}")
+    for statement in AGGREGATE_SQL:
+        conn.execute(statement.format(persons=f"AND person_id {affected}", stats_persons=f"AND s.person_id {affected}"))
+    conn.execute(CO_SUPPORT_AFFECTED_SQL, (min_co_support,))
+
+def build_databases(data, aggregates=False, min_co_support=MIN_CO_SUPPORT):
+    """
+    Builds both databases from scratch in scratch files: one transaction per database,
+    batched executemany, secondary indexes created after the load, then an atomic swap.
+    amendments.sqlite and prss.sqlite share the normalized tables; each keeps its old table as a view.
+    With `aggregates`, prss.sqlite also gets the materialized statistics tables.
+    """
+    rows = normalized_rows(data)
+    amend_conn, amend_build = open_build_db(AMENDMENTS_DB)
+    prss_conn, prss_build = open_build_db(prsS_DB)
+    try:
+        load_database(amend_conn, *AMENDMENTS_DB_OBJECTS, rows)
+        load_database(prss_conn, *PRSS_DB_OBJECTS, rows)
+        if aggregates:
+            materialize_aggregates(prss_conn, min_co_support)
+    except Exception:
+        amend_conn.close()
+        prss_conn.close()
+        remove_db_files(amend_build)
+        remove_db_files(prss_build)
+        raise
+
+    swap_in_db(amend_conn, amend_build, AMENDMENTS_DB)
+    swap_in_db(prss_conn, prss_build, prsS_DB)
+
+def in_batches(values, size=500):
+    """Splits a list for IN (...) queries below SQLite's bound-parameter limit."""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def update_database(conn, tables, rows):
+    """
+    Incrementally applies `rows` (from normalized_rows) to a database built by this script.
+    Only amendments whose record hash changed are rewritten or deleted; persons and conventions
+    are upserted or deleted only where one of those amendments referenced them.
+    Runs in one transaction. Returns (changed, removed, persons, conventions) counts.
+    """
+    new_hashes = dict(rows['record_hashes'])
+    stored = dict(conn.execute("SELECT amendment_id, record_hash FROM record_hashes"))
+    changed = [aid for aid, h in new_hashes.items() if stored.get(aid) != h]
+    removed = [aid for aid in stored if aid not in new_hashes]
+    touched = changed + removed
+    if not touched:
+        return 0, 0, 0, 0
+
+    # Persons and conventions referenced before the change...
+    affected_persons = set()
+    affected_conventions = set()
+    for batch in in_batches(touched):
+        placeholders = ",".join("?" * len(batch))
+        for pid, convention in conn.execute(
+            f"SELECT person_id, convention FROM amendment_support WHERE amendment_id IN ({placeholders})", batch
+        ):
+            affected_persons.add(pid)
+            affected_conventions.add(convention)
+    # ...and after it
+    changed_set = set(changed)
+    new_support = [r for r in rows['amendment_support'] if r[0] in changed_set]
+    for _, pid, _, convention, _ in new_support:
+        affected_persons.add(pid)
+        affected_conventions.add(convention)
+
+    for table, key in AMENDMENT_KEYS.items():
+        if table in tables:
+            conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(aid,) for aid in touched])
+    if 'amendment' in tables:
+        insert_batches(conn, INSERTS['amendment'], (r for r in rows['amendment'] if r[0] in changed_set))
+    insert_batches(conn, INSERTS['amendment_support'], new_support)
+    insert_batches(conn, INSERTS['record_hashes'], ((aid, new_hashes[aid]) for aid in changed))
+
+    persons = {r[0]: r for r in rows['person'] if r[0] in affected_persons}
+    conn.executemany(
+        "INSERT INTO person (id, name, kv) VALUES (?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET name = excluded.name, kv = excluded.kv "
+        "WHERE name IS NOT excluded.name OR kv IS NOT excluded.kv",
+        persons.values(),
+    )
+    conn.executemany("DELETE FROM person WHERE id = ?", [(pid,) for pid in affected_persons if pid not in persons])
+
+    conventions = {r[0]: r for r in rows['conventions'] if r[0] in affected_conventions}
+    conn.executemany("DELETE FROM conventions WHERE id = ?", [(cid,) for cid in affected_conventions])
+    conn.executemany(INSERTS['conventions'], conventions.values())
+    if has_table(conn, 'person_activity'):
+        refresh_aggregates(conn, affected_persons)
+    conn.commit()
+    return len(changed), len(removed), len(affected_persons), len(affected_conventions)
+
+def is_incremental_target(path):
+    """Whether `path` is a database this script built with the current schema."""
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+def update_databases(data, targets):
+    """
+    --incremental: applies the dataset to each (path, tables) target in place,
+    falling back to a full build where a target cannot be updated.
+    Returns False if a full build is needed.
+    """
+    if not all(is_incremental_target(path) for path, _ in targets):
+        return False
+    rows = normalized_rows(data)
+    for path, tables in targets:
+        conn = sqlite3.connect(path)
+        try:
+            changed, removed, persons, conventions = update_database(conn, tables, rows)
+        finally:
+            conn.close()
+        print(f"{os.path.basename(path)}: {changed} amendments upserted, {removed} deleted, "
+              f"{persons} persons and {conventions} conventions recomputed")
+    return True
+
+def build_merged_database(data, path=MERGED_DB, aggregates=False, min_co_support=MIN_CO_SUPPORT):
+    """
+    Builds a single database holding all normalized tables, both compatibility views
+    and FTS5 indexes over amendment labels and person names/KVs (plus the aggregate tables with `aggregates`).
+    """
+    rows = normalized_rows(data)
+    conn, build_path = open_build_db(path)
+    try:
+        load_database(conn, tuple(TABLES), tuple(VIEWS), rows)
+        for statement in SEARCH_INDEXES:
+            conn.execute(statement)
+        conn.commit()
+        if aggregates:
+            materialize_aggregates(conn, min_co_support)
+    except Exception:
+        conn.close()
+        remove_db_files(build_path)
+        raise
+    swap_in_db(conn, build_path, path)
+
+def fts_phrase(query):
+    """Quotes user input as a single FTS5 phrase."""
+    return '"' + query.replace('"', '""') + '"'
+
+def search(conn, query, limit=20):
+    """
+    Searches a merged database. Returns (kind, id, text) rows for amendments whose label and
+    persons whose name or KV contain `query` (case-insensitive), in dataset order.
+    """
+    query = query.strip()
+    if len(query) >= MIN_FTS_QUERY:
+        phrase = fts_phrase(query)
+        amendments = conn.execute(
+            "SELECT 'amendment', a.id, a.label FROM amendment_fts f JOIN amendment a ON a.rowid = f.rowid "
+            "WHERE amendment_fts MATCH ? LIMIT ?",
+            (phrase, limit),
+        ).fetchall()
+        persons = conn.execute(
+            "SELECT 'person', p.id, p.name || CASE WHEN p.kv != '' THEN ' (' || p.kv || ')' ELSE '' END "
+            "FROM person_fts f JOIN person p ON p.rowid = f.rowid "
+            "WHERE person_fts MATCH ? LIMIT ?",
+            (phrase, limit),
+        ).fetchall()
+    else:
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        amendments = conn.execute(
+            "SELECT 'amendment', id, label FROM amendment WHERE label LIKE ? ESCAPE '\\' LIMIT ?",
+            (pattern, limit),
+        ).fetchall()
+        persons = conn.execute(
+            "SELECT 'person', id, name || CASE WHEN kv != '' THEN ' (' || kv || ')' ELSE '' END FROM person "
+            "WHERE name LIKE ? ESCAPE '\\' OR kv LIKE ? ESCAPE '\\' LIMIT ?",
+            (pattern, pattern, limit),
+        ).fetchall()
+    return persons + amendments
 
 def main():
-    yaml_path = DEFAULT_YAML
-    if len(sys.argv) > 1 and sys.argv[1]:
-        yaml_path = sys.argv[1]
-    data = load_yaml(yaml_path)
-    build_databases(data)
+    parser = argparse.ArgumentParser(description="Build the dashboard's SQLite databases from the amendment dataset")
+    parser.add_argument("path", nargs="?", help="Dataset or .yaml file (default: amendments_pipeline.dataset)")
+    parser.add_argument("--merged", nargs="?", const=MERGED_DB, metavar="DB",
+                        help=f"Build one database with all tables and full-text search instead (default: {MERGED_DB})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite amendments that changed since the last build (and the persons they touch)")
+    parser.add_argument("--aggregates", action="store_true",
+                        help="Also materialize person/convention statistics and co-support pairs")
+    parser.add_argument("--min-co-support", type=int, default=MIN_CO_SUPPORT,
+                        help="Smallest number of common amendments for a co_support pair")
+    parser.add_argument("--search", metavar="TEXT", help="Query an existing merged database (see --merged) and exit")
+    args = parser.parse_args()
+
+    if args.search:
+        db_path = args.merged or MERGED_DB
+        if not os.path.exists(db_path):
+            print(f"Error: {db_path} not found. Build it with --merged first.")
+            return
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        for kind, rid, text in search(conn, args.search):
+            print(f"{kind:9} {rid:30} {text}")
+        conn.close()
+        return
+
+    data = load_data(args.path)
+    if data is None:
+        print(f"Error: neither {DATASET_FILE} nor {YAML_FILE} found. Please run the pipeline_scraper.py first.")
+        return
+    if args.merged:
+        if args.incremental and update_databases(data, [(args.merged, tuple(TABLES))]):
+            return
+        build_merged_database(data, args.merged, args.aggregates, args.min_co_support)
+        print(f"Created database:\n - {args.merged}")
+        return
+    if args.incremental and update_databases(
+        data, [(AMENDMENTS_DB, AMENDMENTS_DB_OBJECTS[0]), (prsS_DB, PRSS_DB_OBJECTS[0])]
+    ):
+        return
+    build_databases(data, args.aggregates, args.min_co_support)
     print(f"Created databases:\n - {AMENDMENTS_DB}\n - {prsS_DB}")
 
 if __name__ == "__main__":